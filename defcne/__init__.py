@@ -5,6 +5,10 @@
 import logging
 log = logging.getLogger(__name__)
 
+import os.path
+
+from functools import partial
+
 from pyramid.config import Configurator
 from pyramid.settings import asbool
 from pyramid.session import SignedCookieSessionFactory
@@ -18,9 +22,18 @@ import deform_bootstrap
 from sqlalchemy import engine_from_config
 from sqlalchemy.exc import DBAPIError
 
-from models import DBSession
+from models import (
+        DBSession,
+        UserTickets,
+        )
+from cache import cache_from_settings
+from throttle import throttle_from_settings
+from logos import LogoStore
+from assets import ContentHashCacheBuster
+from cvetypes import cve_types
 import auth
 import acl
+import passwords
 
 def main(global_config, **settings):
     """ This function returns a Pyramid WSGI application.
@@ -44,6 +57,12 @@ def main(global_config, **settings):
     else:
         settings['defcne.registration_open'] = asbool(settings['defcne.registration_open'])
 
+    settings['defcne.tickets.max_age'] = int(settings.get('defcne.tickets.max_age', UserTickets.max_age))
+    settings['defcne.tickets.max_per_user'] = int(settings.get('defcne.tickets.max_per_user', 0))
+
+    # Start the password hashing pool before anything else is set up
+    passwords.configure(settings)
+
     engine = engine_from_config(settings, 'sqlalchemy.')
     DBSession.configure(bind=engine)
     config = Configurator(settings=settings)
@@ -51,12 +70,12 @@ def main(global_config, **settings):
     _session_factory = SignedCookieSessionFactory(
             settings['pyramid.secretcookie'],
             httponly=True,
-            max_age=864000
+            max_age=settings['defcne.tickets.max_age']
             )
 
     _authn_policy = AuthTktAuthenticationPolicy(
             settings['pyramid.auth.secret'],
-            max_age=864000,
+            max_age=settings['defcne.tickets.max_age'],
             http_only=True,
             debug=True,
             hashalg='sha512',
@@ -65,6 +84,13 @@ def main(global_config, **settings):
 
     _authz_policy = ACLAuthorizationPolicy()
 
+    config.registry.principal_cache = cache_from_settings(settings, 'defcne.principal_cache.')
+    config.registry.listing_cache = cache_from_settings(settings, 'defcne.listing_cache.', ttl=300, maxsize=64)
+    config.registry.name_cache = cache_from_settings(settings, 'defcne.name_cache.', ttl=30, maxsize=4096)
+    config.registry.login_throttle = throttle_from_settings(settings)
+    config.registry.logo_store = LogoStore(settings['defcne.upload_path'],
+            sizes=[int(size) for size in settings.get('defcne.logos.sizes', '200').split()])
+
     config.set_session_factory(_session_factory)
     config.set_authentication_policy(_authn_policy)
     config.set_authorization_policy(_authz_policy)
@@ -79,9 +105,36 @@ def main(global_config, **settings):
     return config.make_wsgi_app()
 
 def add_routes(config):
-    config.add_static_view('static', 'static', cache_max_age=3600)
-    config.add_static_view('deform_static', 'deform:static', cache_max_age=3600)
-    config.add_static_view('files', config.registry.settings['defcne.upload_path'], cache_max_age=3600)
+    settings = config.registry.settings
+
+    # Static assets get a hash of their contents added to their URL, so they
+    # can be cached for a long time and a deploy still busts the cache. The
+    # static views use the short max-age, static_immutable upgrades responses
+    # for versioned URL's (and content addressed logos) to the long one.
+    max_age = int(settings.get('defcne.static.short_max_age', 3600))
+    config.registry.static_max_age = int(settings.get('defcne.static.max_age', 31536000))
+    static_kw = {}
+
+    if settings.get('defcne.static.content_encodings'):
+        static_kw['content_encodings'] = settings['defcne.static.content_encodings'].split()
+
+    config.add_static_view('static', 'static', cache_max_age=max_age, **static_kw)
+    config.add_static_view('deform_static', 'deform:static', cache_max_age=max_age, **static_kw)
+
+    cache_buster = ContentHashCacheBuster()
+    cache_buster.build('defcne:static/')
+    cache_buster.build('deform:static/')
+    config.registry.cache_buster = cache_buster
+
+    config.add_cache_buster('defcne:static/', cache_buster)
+    config.add_cache_buster('deform:static/', cache_buster)
+
+    # Uploaded logos and their derivatives are stored by the hash of their
+    # contents, so they never change (static_immutable recognises them by
+    # name, older uploads keep the short max-age). 'logos' has to be added
+    # before 'files' so that static_url() uses it.
+    config.add_static_view('logos', os.path.join(settings['defcne.upload_path'], 'd'), cache_max_age=max_age)
+    config.add_static_view('files', settings['defcne.upload_path'], cache_max_age=max_age)
 
     # Routes:
     # /
@@ -93,14 +146,9 @@ def add_routes(config):
     # /user/*traverse
     config.add_route('defcne.user', '/user/*traverse', factory=acl.User)
 
-    # /e/*traverse
-    config.add_route('defcne.e', '/events/*traverse', factory=acl.Events)
-
-    # /c/*traverse
-    config.add_route('defcne.c', '/contests/*traverse', factory=acl.Contests)
-
-    # /v/*travarse
-    config.add_route('defcne.v', '/villages/*traverse', factory=acl.Villages)
+    # /events/*traverse, /contests/*traverse, /villages/*traverse
+    for cvetype in cve_types.values():
+        config.add_route(cvetype.route, '/{}/*traverse'.format(cvetype.path), factory=partial(acl.CVEs, cvetype=cvetype))
 
     # /magic/*traverse
     config.add_route('defcne.magic', '/magic/*traverse', factory=acl.Magic)
@@ -115,6 +163,7 @@ def add_views(config):
     config.add_notfound_view('defcne.views.errors.bad_request', renderer='bad_request.mako', request_method='POST')
     config.add_notfound_view('defcne.views.errors.not_found', renderer='not_found.mako', append_slash=True)
     config.add_forbidden_view('defcne.views.errors.forbidden', renderer='forbidden.mako')
+    config.add_view('defcne.views.errors.busy', context='defcne.passwords.PasswordHasherBusy', renderer='busy.mako')
 
     class CreateAllowed(object):
         def __init__(self, is_or_not, config):
@@ -139,5 +188,19 @@ def add_events(config):
             'defcne.events.UserChangedPassword')
     config.add_subscriber('defcne.subscribers.cne_created',
             'defcne.events.CVECreated')
-    config.add_subscriber('defcne.subscribers.cne_updated',
+    config.add_subscriber('defcne.subscribers.cne_history',
+            'defcne.events.CVECreated')
+    config.add_subscriber('defcne.subscribers.cne_history',
+            'defcne.events.CVEUpdated')
+    config.add_subscriber('defcne.subscribers.cne_invalidate_listing',
+            'defcne.events.CVECreated')
+    config.add_subscriber('defcne.subscribers.cne_invalidate_listing',
+            'defcne.events.CVEUpdated')
+    config.add_subscriber('defcne.subscribers.cne_name_taken',
+            'defcne.events.CVECreated')
+    config.add_subscriber('defcne.subscribers.cne_name_taken',
             'defcne.events.CVEUpdated')
+    config.add_subscriber('defcne.subscribers.cnes_status_changed',
+            'defcne.events.CVEStatusChanged')
+    config.add_subscriber('defcne.assets.static_immutable',
+            'pyramid.events.NewResponse')
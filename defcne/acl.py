@@ -11,11 +11,88 @@ from pyramid.security import (
         )
 
 import models as m
+from cvetypes import find_path
 
 class FakeRoot(object):
     __name__ = None
     __parent__ = None
 
+# The ACL shared by all events/contests/villages, cve_acl() adds the entries
+# for the owner and whether it has been published.
+_cve_acl = (
+        (Allow, "group:administrators", ALL_PERMISSIONS),
+        (Allow, "group:staff", 'edit'),
+        (Allow, "group:staff", 'view'),
+        (Allow, "group:staff", 'manage'),
+        )
+
+_cve_owner_permissions = ('edit', 'view', 'manage')
+_cve_published = (Allow, Everyone, 'view')
+
+def cve_acl(cve):
+    """
+    Build the ACL for an event/contest/village
+
+    The owner is taken from the user_id column so that building the ACL never
+    has to load the owner from the database.
+    """
+
+    acl = list(_cve_acl)
+    acl.append((Allow, u'userid:' + unicode(cve.user_id), _cve_owner_permissions))
+
+    if cve.status == 5:
+        acl.append(_cve_published)
+
+    return acl
+
+# The relationships each CVE view needs, None loads everything required by
+# to_appstruct(), views that aren't listed only get the owner.
+_cve_view_relations = {
+        '': None,
+        'edit': None,
+        'manage': None,
+        }
+
+def _view_name(request, resource):
+    """
+    Returns the path segment that follows the child of `resource` that is being
+    looked up, which is the view name for a CVE.
+    """
+
+    depth = 0
+    parent = resource
+
+    while parent.__parent__ is not None:
+        depth = depth + 1
+        parent = parent.__parent__
+
+    traverse = (request.matchdict or {}).get('traverse', ())
+
+    if len(traverse) > depth:
+        return traverse[depth]
+
+    return ''
+
+def load_cve(request, parent, model, key):
+    """
+    Load the CVE of type `model` with id `key` for the DEF CON of `parent`,
+    along with the relationships needed by the view that is going to be
+    rendered. Raises KeyError if there is no such CVE.
+    """
+
+    try:
+        cid = int(key)
+    except ValueError:
+        raise KeyError(key)
+
+    relations = _cve_view_relations.get(_view_name(request, parent), ())
+    cve = model.find_cve(parent.dc, cid, relations)
+
+    if cve is None:
+        raise KeyError(key)
+
+    return cve
+
 # The traversal for /user/
 
 class User(object):
@@ -60,23 +137,24 @@ class Username(object):
     def __getitem__(self, key):
         raise KeyError
 
-# The traversal for /events/
+# The traversal for /events/, /contests/, /villages/ (see cvetypes)
 
-class Events(object):
-    __name__ = 'events'
+class CVEs(object):
     __parent__ = FakeRoot()
     __acl__ = [
                 (Allow, "group:adminstrators", ALL_PERMISSIONS),
                 (Allow, Authenticated, 'create'),
             ]
 
-    def __init__(self, request):
+    def __init__(self, request, cvetype):
+        self.__name__ = cvetype.path
         self.request = request
+        self.type = cvetype
 
     def __getitem__(self, key):
         try:
             dc = int(key)
-            item = DefconEvent(dc)
+            item = DefconCVE(self.request, self.type, dc)
 
             item.__parent__ = self
 
@@ -85,137 +163,39 @@ class Events(object):
         except ValueError:
             raise KeyError
 
-class DefconEvent(object):
-    def __init__(self, dc):
+class DefconCVE(object):
+    def __init__(self, request, cvetype, dc):
         self.__name__ = dc
-        self.dc = dc
-
-    def __getitem__(self, key):
-        try:
-            eid = int(key)
-        except ValueError:
-            return None
-
-        event = m.DBSession.query(m.Event).get(eid)
-
-        if event is None:
-            return None
-        else:
-            item = Event(event)
-            item.__parent__ = self
-
-            return item
-
-class Event(object):
-    @property
-    def __acl__(self):
-        acl = [
-                (Allow, "group:administrators", ALL_PERMISSIONS),
-                (Allow, "group:staff", 'edit'),
-                (Allow, "group:staff", 'view'),
-                (Allow, "group:staff", 'manage'),
-                (Allow, "userid:{id}".format(id=self.event.owner.id), ('edit', 'view', 'manage')),
-                ]
-
-        if self.event.status == 5:
-            acl.append((Allow, Everyone, 'view'))
-
-        return acl
-
-    def __init__(self, event):
-        self.event = event
-        self.__name__ = event.id
-
-    def __getitem__(self, key):
-        raise KeyError
-
-# The traversal for /contests/
-
-class Contests(object):
-    __name__ = 'contests'
-    __parent__ = FakeRoot()
-    __acl__ = [
-                (Allow, "group:adminstrators", ALL_PERMISSIONS),
-                (Allow, Authenticated, 'create'),
-            ]
-
-    def __init__(self, request):
         self.request = request
-
-    def __getitem__(self, key):
-        try:
-            dc = int(key)
-            item = DefconContest(dc)
-
-            item.__parent__ = self
-
-            return item
-
-        except ValueError:
-            raise KeyError
-
-class DefconContest(object):
-    def __init__(self, dc):
-        self.__name__ = dc
+        self.type = cvetype
         self.dc = dc
 
     def __getitem__(self, key):
-        try:
-            cid = int(key)
-        except ValueError:
-            return None
-
-        contest = m.DBSession.query(m.Contest).get(cid)
-
-        if contest is None:
-            return None
-        else:
-            item = Contest(contest)
-            item.__parent__ = self
-
-            return item
-
-class Contest(object):
-    @property
-    def __acl__(self):
-        acl = [
-                (Allow, "group:administrators", ALL_PERMISSIONS),
-                (Allow, "group:staff", 'edit'),
-                (Allow, "group:staff", 'view'),
-                (Allow, "group:staff", 'manage'),
-                (Allow, "userid:{id}".format(id=self.contest.owner.id), ('edit', 'view', 'manage')),
-                ]
-
-        if self.contest.status == 5:
-            acl.append((Allow, Everyone, 'view'))
+        item = CVE(load_cve(self.request, self, self.type.model, key), self.type)
+        item.__parent__ = self
 
-        return acl
+        return item
 
-    def __init__(self, contest):
-        self.contest = contest
-        self.__name__ = contest.id
+class CVE(object):
+    def __init__(self, cve, cvetype):
+        self.cve = cve
+        self.type = cvetype
+        self.__name__ = cve.id
+        self.__acl__ = cve_acl(cve)
 
     def __getitem__(self, key):
         raise KeyError
 
+class Badges(object):
+    __name__ = 'badges'
 
-# The traversal for /villages/
-
-class Villages(object):
-    __name__ = 'villages'
-    __parent__ = FakeRoot()
-    __acl__ = [
-                (Allow, "group:adminstrators", ALL_PERMISSIONS),
-                (Allow, Authenticated, 'create'),
-            ]
-
-    def __init__(self, request):
-        self.request = request
+    def __init__(self):
+        pass
 
     def __getitem__(self, key):
         try:
             dc = int(key)
-            item = DefconVillage(dc)
+            item = DefconBadges(dc)
 
             item.__parent__ = self
 
@@ -224,55 +204,14 @@ class Villages(object):
         except ValueError:
             raise KeyError
 
-class DefconVillage(object):
+class DefconBadges(object):
     def __init__(self, dc):
         self.__name__ = dc
         self.dc = dc
 
-    def __getitem__(self, key):
-        try:
-            cid = int(key)
-        except ValueError:
-            return None
-
-        village = m.DBSession.query(m.Village).get(cid)
-
-        if village is None:
-            return None
-        else:
-            item = Village(village)
-            item.__parent__ = self
-
-            return item
-
-class Village(object):
-    @property
-    def __acl__(self):
-        acl = [
-                (Allow, "group:administrators", ALL_PERMISSIONS),
-                (Allow, "group:staff", 'edit'),
-                (Allow, "group:staff", 'view'),
-                (Allow, "group:staff", 'manage'),
-                (Allow, "userid:{id}".format(id=self.village.owner.id), ('edit', 'view', 'manage')),
-                ]
-
-        if self.village.status == 5:
-            acl.append((Allow, Everyone, 'view'))
-
-        return acl
-
-    def __init__(self, village):
-        self.village = village
-        self.__name__ = village.id
-
     def __getitem__(self, key):
         raise KeyError
 
-
-class Badges(object):
-    def __init__(self):
-        pass
-
 # The traversal for /magic/
 
 class Magic(object):
@@ -289,14 +228,10 @@ class Magic(object):
     def __getitem__(self, key):
         item = None
 
-        if key == 'events':
-            item = Events(self.request)
-
-        if key == 'contests':
-            item = Contests(self.request)
+        cvetype = find_path(key)
 
-        if key == 'villages':
-            item = Villages(self.request)
+        if cvetype is not None:
+            item = CVEs(self.request, cvetype)
 
         if key == 'users':
             item = Usernames(self.request)
@@ -0,0 +1,127 @@
+# File: assets.py
+# Author: Bert JW Regeer <bertjw@regeer.org>
+# Created: 2026-10-18
+
+import logging
+log = logging.getLogger(__name__)
+
+import datetime
+import hashlib
+import os
+import os.path
+import re
+import threading
+
+from pyramid.path import AssetResolver
+
+def _file_hash(filename):
+    digest = hashlib.sha1()
+
+    with open(filename, 'rb') as f:
+        while True:
+            chunk = f.read(64 * 1024)
+
+            if not chunk:
+                break
+
+            digest.update(chunk)
+
+    return digest.hexdigest()[:12]
+
+class ContentHashCacheBuster(object):
+    """
+    Cache buster that adds a hash of the contents of the file to its URL
+
+    The hashes are kept in a manifest for the lifetime of the process, the
+    manifest can be filled ahead of time with `build()` (at startup) so that
+    no files have to be read while rendering pages. Files not in the manifest
+    are hashed the first time their URL is generated.
+    """
+
+    def __init__(self, param='v'):
+        self.param = param
+        self.manifest = {}
+        self._lock = threading.Lock()
+        self._resolver = AssetResolver()
+
+    def _filename(self, spec):
+        return self._resolver.resolve(spec).abspath()
+
+    def build(self, spec):
+        """
+        Add all of the files under the asset spec/directory `spec`
+        """
+
+        root = self._filename(spec)
+        prefix = spec.rstrip('/') + '/'
+        manifest = {}
+
+        for (dirpath, dirnames, filenames) in os.walk(root):
+            for filename in filenames:
+                full = os.path.join(dirpath, filename)
+                manifest[prefix + os.path.relpath(full, root).replace(os.sep, '/')] = _file_hash(full)
+
+        with self._lock:
+            self.manifest.update(manifest)
+
+        log.debug('Added {} files under {} to the asset manifest'.format(len(manifest), spec))
+
+    def token(self, spec):
+        token = self.manifest.get(spec)
+
+        if token is None:
+            try:
+                token = _file_hash(self._filename(spec))
+            except (IOError, OSError):
+                return None
+
+            with self._lock:
+                self.manifest[spec] = token
+
+        return token
+
+    def __call__(self, request, subpath, kw):
+        token = self.token(kw.get('rawspec', kw.get('pathspec')))
+
+        if token is None:
+            return (subpath, kw)
+
+        query = kw.setdefault('_query', {})
+
+        if isinstance(query, dict):
+            query[self.param] = token
+        else:
+            kw['_query'] = tuple(query) + ((self.param, token),)
+
+        return (subpath, kw)
+
+# Logos (and their derivatives) named after the sha256 of their contents
+_logo_re = re.compile(r'/[0-9a-f]{64}(\.[a-z0-9]{1,5})*$')
+
+def static_immutable(event):
+    """
+    Static views are served with a short max-age, so that files referenced
+    without a version (from CSS, or old uploads) are picked up after a deploy.
+    Responses that can never change, versioned static assets and content
+    addressed logos, are given the long max-age and marked as immutable, so
+    that browsers don't revalidate them at all until they expire.
+    """
+
+    request = event.request
+    route = request.matched_route
+
+    if route is None or not route.name.startswith('__'):
+        return
+
+    if route.name in ('__files/', '__logos/'):
+        if not _logo_re.search(request.path):
+            return
+    elif request.registry.cache_buster.param not in request.GET:
+        return
+
+    response = event.response
+
+    if response.status_int == 200:
+        response.cache_control.max_age = request.registry.static_max_age
+        response.headers['Cache-Control'] = response.headers['Cache-Control'] + ', immutable'
+        response.expires = datetime.datetime.utcnow() + datetime.timedelta(seconds=request.registry.static_max_age)
@@ -2,10 +2,13 @@
 # Author: Bert JW Regeer <bertjw@regeer.org>
 # Created: 2013-02-08
 
+import calendar
 import random
 import string
+import time
 
 from pyramid import security
+from pyramid.decorator import reify
 
 from models import (
         DBSession,
@@ -13,6 +16,40 @@ from models import (
         UserTickets,
         )
 
+from cache import delete_after_commit
+
+class UserData(object):
+    """
+    The information about the current user that is attached to the request
+
+    The username and groups are always available, the `user` and `ticket` are
+    only loaded from the database when they are accessed, so that requests that
+    are served from the principal cache don't have to hit the database at all.
+    """
+
+    def __init__(self, userid=None, username=None, ticket=None, groups=None):
+        self.userid = userid
+        self.username = username
+        self.ticket_id = ticket
+        self.groups = groups
+
+    @reify
+    def user(self):
+        if self.userid is None:
+            return None
+
+        return DBSession.query(User).get(self.userid)
+
+    @reify
+    def ticket(self):
+        if self.userid is None:
+            return None
+
+        return DBSession.query(UserTickets).filter(UserTickets.ticket == self.ticket_id, UserTickets.user_id == self.userid).first()
+
+def _principal_key(ticket, username):
+    return ('principals', ticket, username.lower())
+
 def current_user(request):
     """
     This is added to the request as an attribute named "user"
@@ -22,28 +59,13 @@ def current_user(request):
     unnecessarily. It is highly unlikely that in the milliseconds it takes to
     render the page that the user is going to lose access to a particular
     resource.
-    """
-
-    class UserData:
-        pass
-    
-    def _user_nonexistent():
-        udata = UserData()
-        udata.username = None 
-        udata.user = None
-        udata.ticket = None
-        udata.groups = None
 
-        return udata
-
-    def _user_exists(user, ticket, groups):
-        udata = UserData()
-        udata.username = user.disp_uname
-        udata.user = user
-        udata.ticket = ticket
-        udata.groups = groups
-
-        return udata
+    The principals for a ticket/username are also stored in the principal
+    cache, so that subsequent requests with the same ticket don't have to look
+    up the ticket and the users groups again. Anything that removes a ticket or
+    changes a users groups has to call `invalidate_ticket` or
+    `invalidate_user`.
+    """
 
     userid = security.unauthenticated_userid(request)
     
@@ -54,14 +76,29 @@ def current_user(request):
 
         # If we don't get a ticket, we return that the user is non-existent
         if cur_ticket is None:
-            return _user_nonexistent()
+            return UserData()
+
+        cache = request.registry.principal_cache
+        key = _principal_key(cur_ticket, userid)
+        principals = cache.get(key)
+
+        if principals is not None:
+            # Entries cached by older versions have no expiry, they are
+            # treated as expired. The ticket is then checked in the database,
+            # which also refuses it if it is past its max_age.
+            if principals.get('expires', 0) > time.time():
+                return UserData(principals['id'], principals['username'], cur_ticket, principals['groups'])
+
+            cache.delete(key)
+
+        max_age = request.registry.settings['defcne.tickets.max_age']
       
         # Find the user by looking up the ticket/username
-        ticket = UserTickets.find_ticket_username(cur_ticket, userid)
+        ticket = UserTickets.find_ticket_username(cur_ticket, userid, max_age)
         
         # If the ticket has been removed, we unauth the user
         if ticket is None:
-            return _user_nonexistent()
+            return UserData()
 
         user = ticket.user
        
@@ -69,10 +106,45 @@ def current_user(request):
         user_groups = ['userid:' + unicode(user.id)]
         user_groups.extend(['group:' + grp.name for grp in user.groups])
 
-        # Return a valid user containing data
-        return _user_exists(user, ticket, user_groups)
+        cache.set(key, {
+            'id': user.id,
+            'username': user.disp_uname,
+            'groups': user_groups,
+            'expires': calendar.timegm(ticket.created.utctimetuple()) + max_age,
+            })
+
+        # Return a valid user containing data, we already have the user and
+        # ticket so there is no need to lazily load them later
+        udata = UserData(user.id, user.disp_uname, cur_ticket, user_groups)
+        udata.user = user
+        udata.ticket = ticket
+        return udata
+
+    return UserData()
+
+def invalidate_ticket(request, ticket, username):
+    """
+    Remove the cached principals for a single ticket
+
+    They are removed again once the transaction has committed, so that a
+    concurrent request can't cache the old groups or ticket until the TTL runs
+    out.
+    """
+
+    delete_after_commit(request.registry.principal_cache, _principal_key(ticket, username))
+
+def invalidate_user(request, user):
+    """
+    Remove the cached principals for all of the users tickets
+
+    This has to be called before the users tickets are removed from the
+    database, otherwise we are no longer able to find them.
+    """
 
-    return _user_nonexistent() 
+    tickets = DBSession.query(UserTickets.ticket).filter(UserTickets.user_id == user.id)
+
+    for (ticket,) in tickets:
+        invalidate_ticket(request, ticket, user.username)
 
 def user_groups(userid, request):
     """
@@ -88,7 +160,7 @@ def user_groups(userid, request):
 
     user = request.user
 
-    if user.user is None:
+    if user.userid is None:
         return None
 
     return user.groups
@@ -100,6 +172,9 @@ def remember(request, principal, **kw):
     First we create a brand new ticket, add it for the user to the database as
     a valid ticket, then we call security.remember() which does the actual work
     of creating the cookie that is going to get sent to the user.
+
+    If defcne.tickets.max_per_user is set the users oldest tickets are removed
+    so that the user has at most that many tickets.
     """
 
     ticket = ''.join(random.choice(string.ascii_uppercase + string.ascii_lowercase + string.digits) for x in range(128))
@@ -107,6 +182,15 @@ def remember(request, principal, **kw):
     user = User.find_user_no_groups(principal)
     user.tickets.append(UserTickets(ticket=ticket, remote_addr=request.environ['REMOTE_ADDR'] if 'REMOTE_ADDR' in request.environ else None))
 
+    # Only keep the newest tickets if the amount of tickets per user is capped
+    max_per_user = request.registry.settings['defcne.tickets.max_per_user']
+
+    if max_per_user:
+        DBSession.flush()
+
+        for old_ticket in UserTickets.trim_user(user.id, max_per_user):
+            invalidate_ticket(request, old_ticket, user.username)
+
     if 'tokens' in kw:
         kw['tokens'].append('tkt_' + ticket)
     else:
@@ -119,14 +203,15 @@ def forget(request):
     Forget the users session/ticket
 
     This removes the users session/ticket entirely, unsets the cookie as well
-    as removing the ticket from the database.
+    as removing the ticket from the database and the principal cache.
     """
     
     user = request.user
 
-    if user.user is None:
+    if user.userid is None:
         return security.forget(request)
 
-    DBSession.delete(user.ticket) 
+    invalidate_ticket(request, user.ticket_id, user.username)
+    DBSession.query(UserTickets).filter(UserTickets.ticket == user.ticket_id, UserTickets.user_id == user.userid).delete()
     
     return security.forget(request)
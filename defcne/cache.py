@@ -0,0 +1,135 @@
+# File: cache.py
+# Author: Bert JW Regeer <bertjw@regeer.org>
+# Created: 2026-10-18
+
+import logging
+log = logging.getLogger(__name__)
+
+import hashlib
+import threading
+import time
+import transaction
+
+from collections import OrderedDict
+
+from pyramid.settings import aslist
+
+class MemoryCache(object):
+    """
+    An in-process cache with LRU eviction and a per entry time-to-live
+
+    Entries are evicted once there are more than `maxsize` of them, least
+    recently used first, or once they are older than their time-to-live. This
+    is shared between all of the threads in a single waitress process.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                (expires, value) = self._data.pop(key)
+            except KeyError:
+                return default
+
+            if expires < time.time():
+                return default
+
+            # Re-insert so that it is now the most recently used
+            self._data[key] = (expires, value)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires = time.time() + (ttl if ttl is not None else self.ttl)
+
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (expires, value)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+class MemcachedCache(object):
+    """
+    A cache stored in memcached, shared by all waitress processes
+
+    Keys are hashed, since memcached does not allow keys longer than 250
+    characters or containing whitespace. Values have to be picklable.
+    """
+
+    def __init__(self, servers, ttl=60, prefix='defcne'):
+        try:
+            import memcache
+        except ImportError:
+            log.error('The memcached cache backend requires python-memcached.')
+            raise
+
+        self.ttl = ttl
+        self.prefix = prefix
+        self._client = memcache.Client(servers)
+
+    def _key(self, key):
+        return '{}:{}'.format(self.prefix, hashlib.sha1(repr(key)).hexdigest())
+
+    def get(self, key, default=None):
+        value = self._client.get(self._key(key))
+        return default if value is None else value
+
+    def set(self, key, value, ttl=None):
+        self._client.set(self._key(key), value, time=ttl if ttl is not None else self.ttl)
+
+    def delete(self, key):
+        self._client.delete(self._key(key))
+
+    def clear(self):
+        # Memcached can't clear just our keys, so we flush everything
+        self._client.flush_all()
+
+def cache_from_settings(settings, prefix, ttl=60, maxsize=1024):
+    """
+    Create a cache from the settings starting with `prefix`
+
+    `prefix` + `backend` is either "memory" (default) or "memcached", if it is
+    memcached `prefix` + `servers` contains the list of servers to use.
+    `prefix` + `ttl` and `prefix` + `maxsize` may be used to override the
+    defaults.
+    """
+
+    backend = settings.get(prefix + 'backend', 'memory')
+    ttl = int(settings.get(prefix + 'ttl', ttl))
+
+    if backend == 'memory':
+        return MemoryCache(maxsize=int(settings.get(prefix + 'maxsize', maxsize)), ttl=ttl)
+
+    if backend == 'memcached':
+        servers = aslist(settings.get(prefix + 'servers', '127.0.0.1:11211'))
+        return MemcachedCache(servers, ttl=ttl, prefix=prefix.rstrip('.'))
+
+    raise ValueError('Unknown cache backend "{}" for {}'.format(backend, prefix))
+
+def delete_after_commit(cache, key):
+    """
+    Delete `key` from `cache` now, and again once the current transaction has
+    committed. A concurrent request may cache a value computed from the old
+    rows until the commit, the second delete removes it.
+    """
+
+    cache.delete(key)
+
+    def hook(success):
+        if success:
+            cache.delete(key)
+
+    transaction.get().addAfterCommitHook(hook)
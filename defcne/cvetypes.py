@@ -0,0 +1,152 @@
+# File: cvetypes.py
+# Author: Bert JW Regeer <bertjw@regeer.org>
+# Created: 2026-10-18
+
+from collections import OrderedDict
+
+import models as m
+
+from forms import (
+        ContestForm,
+        ContestManagement,
+        EventForm,
+        EventManagement,
+        VillageForm,
+        VillageManagement,
+        )
+
+class CVEType(object):
+    """
+    A type of CVE (contest, village or event)
+
+    Contains everything the generic CVE views need to know about a type: the
+    model, the proposal and management forms, the path and route it is served
+    on, and a function returning the fields that are shown on the manage pages
+    for a CVE of this type.
+    """
+
+    def __init__(self, name, title, path, route, model, form, management, listitems):
+        self.name = name
+        self.title = title
+        self.path = path
+        self.route = route
+        self.model = model
+        self.form = form
+        self.management = management
+        self._listitems = listitems
+
+    def listitems(self, appstruct):
+        return self._listitems(appstruct)
+
+# All of the CVE types, by name (the polymorphic identity of the model)
+cve_types = OrderedDict()
+
+def register(cvetype):
+    """
+    Add a CVE type. This has to happen before the routes and views are
+    configured.
+    """
+
+    cve_types[cvetype.name] = cvetype
+
+def find_path(path):
+    for cvetype in cve_types.values():
+        if cvetype.path == path:
+            return cvetype
+
+    return None
+
+def name_cache_key(dc, type, name):
+    """
+    The key in the name cache for the availability of a CVE name
+    """
+
+    # The type may be a str (from a CVEType) or unicode (from the database),
+    # they have to result in the same key for the memcached backend
+    return ('name', int(dc), unicode(type), unicode(name).lower())
+
+_poc_listitems = [
+        ('name', 'Name', 'text'),
+        ('email', 'Email', 'text'),
+        ('cellphone', 'Cellphone', 'text'),
+        ]
+
+_power_listitems = [
+        ('outlets', 'Outlets', 'text'),
+        ('justification', 'Justification', 'text'),
+        ('threephase', 'Three Phase', 'boolean'),
+        ]
+
+_drop_listitems = [
+        ('justification', 'Justification', 'text')
+        ]
+
+_ap_listitems = [
+        ('hwmac', 'HW MAC', 'text'),
+        ('apbrand', 'Access Point Brand', 'text'),
+        ('ssid', 'SSID', 'text'),
+        ]
+
+_onsite_listitems = [
+        ('tables', 'Tables', 'text'),
+        ('chairs', 'Chairs', 'text'),
+        ('stage', 'Stage', 'boolean'),
+        ('location', 'Location', 'text'),
+        ('mobilebar', 'Mobile Bar', 'text'),
+        ]
+
+def _event_listitems(e):
+    listitems = [
+            ('onsite', 'Onsite', 'boolean'),
+            ('official', 'Official', 'boolean'),
+            ('security', 'Security', 'boolean'),
+            ('signage', 'Signage', 'text'),
+            ((_poc_listitems, 'pocs'), 'Points of Contact', 'list'),
+            ]
+
+    if e['onsite'] and 'space' in e:
+        listitems.append(((_onsite_listitems, 'space'), 'Onsite Space Requirements', 'sub'))
+
+    return listitems
+
+def _contest_listitems(e):
+    return [
+            ('hrsofoperation', 'Hours of Operation', 'text'),
+            ((_power_listitems, 'power'), 'Power', 'list'),
+            ('spacereq', 'Space Requirements', 'text'),
+            ('tables', 'Tables', 'text'),
+            ('chairs', 'Chairs', 'text'),
+            ('signage', 'Signage', 'text'),
+            ('projectors', 'Projectors', 'text'),
+            ('screens', 'Screens', 'text'),
+            ((_drop_listitems, 'drops'), 'Wired Ethernet', 'list'),
+            ((_ap_listitems, 'aps'), 'Access Points', 'list'),
+            ('represent', 'Representation', 'text'),
+            ('numparticipants', 'Number of participants', 'text'),
+            ('years', 'Years Ran', 'text'),
+            ((_poc_listitems, 'pocs'), 'Points of Contact', 'list'),
+            ('blackbadge_consideration', 'Blackbadge', 'text'),
+            ]
+
+def _village_listitems(e):
+    return [
+            ('hrsofoperation', 'Hours of Operation', 'text'),
+            ((_power_listitems, 'power'), 'Power', 'list'),
+            ('spacereq', 'Space Requirements', 'text'),
+            ('tables', 'Tables', 'text'),
+            ('chairs', 'Chairs', 'text'),
+            ('signage', 'Signage', 'text'),
+            ('projectors', 'Projectors', 'text'),
+            ('screens', 'Screens', 'text'),
+            ((_drop_listitems, 'drops'), 'Wired Ethernet', 'list'),
+            ((_ap_listitems, 'aps'), 'Access Points', 'list'),
+            ('numparticipants', 'Number of participants', 'text'),
+            ('years', 'Years Ran', 'text'),
+            ((_poc_listitems, 'pocs'), 'Points of Contact', 'list'),
+            ('quiet_time', 'Quiet Time', 'boolean'),
+            ('sharing', 'Sharing', 'boolean'),
+            ]
+
+register(CVEType('event', 'Event', 'events', 'defcne.e', m.Event, EventForm, EventManagement, _event_listitems))
+register(CVEType('contest', 'Contest', 'contests', 'defcne.c', m.Contest, ContestForm, ContestManagement, _contest_listitems))
+register(CVEType('village', 'Village', 'villages', 'defcne.v', m.Village, VillageForm, VillageManagement, _village_listitems))
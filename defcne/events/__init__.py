@@ -29,6 +29,19 @@ class CVECreated(CVEEvents):
 class CVEUpdated(CVEEvents):
     pass
 
+class CVEStatusChanged(object):
+    """
+    The status of one or more CVE's of the same type and DEF CON has been
+    changed at once. `changed` is a list of (id, old status).
+    """
+
+    def __init__(self, request, context, changed, status, **kw):
+        self.request = request
+        self.context = context
+        self.changed = changed
+        self.status = status
+        self.kw = kw
+
 class CVETicket(CVEEvents):
     def __init__(self, ticket, *args, **kw):
         self.ticket = ticket
@@ -0,0 +1,156 @@
+# File: export.py
+# Author: Bert JW Regeer <bertjw@regeer.org>
+# Created: 2026-10-18
+
+import csv
+import json
+
+from cStringIO import StringIO
+
+from sqlalchemy import (
+        func,
+        select,
+        )
+
+import models as m
+from models.cvebase import status_types
+
+def _child_tables(model):
+    """
+    Returns (name, table, foreign key, columns, uselist) for every child
+    collection of `model` that is included in to_appstruct()
+    """
+
+    children = []
+
+    for name in model.__listing_relations__:
+        if name == 'owner':
+            continue
+
+        rel = model.__mapper__.relationships[name]
+        table = rel.mapper.local_table
+        fk = list(rel.remote_side)[0]
+        columns = [c for c in table.c if c is not fk and c.name != 'id']
+        children.append((name, table, fk, columns, rel.uselist))
+
+    badges = m.Badges.__table__
+    children.append(('badges', badges, badges.c.cve_id, [badges.c.type, badges.c.amount, badges.c.reason], True))
+
+    return children
+
+def fields(model):
+    """
+    Returns the names of the fields of the rows returned by export_rows()
+    """
+
+    table = model.__mapper__.local_table
+    cve = m.CVEBase.__table__
+
+    names = [c.name for c in cve.c if c.name not in ('user_id', 'type')]
+    names.append('owner')
+    names.extend(c.name for c in table.c if c.name != 'id')
+    names.extend(name for (name, _, _, _, _) in _child_tables(model))
+    names.append('tickets')
+
+    return names
+
+def export_rows(engine, model, dc, batch_size=500):
+    """
+    Generates a dictionary for every CVE of type `model` for a DEF CON
+
+    The CVE's are read using a server side cursor on a connection of its own
+    (so this may be used after the request's transaction has ended), `batch_size`
+    at a time. The child collections and ticket counts are loaded with one
+    query per collection per batch, so memory use does not depend on the
+    amount of CVE's.
+    """
+
+    cve = m.CVEBase.__table__
+    table = model.__mapper__.local_table
+    users = m.User.__table__
+    tickets = m.Ticket.__table__
+
+    columns = [c for c in cve.c if c.name not in ('user_id', 'type')]
+    columns.append(users.c.disp_uname.label('owner'))
+    columns.extend(c for c in table.c if c.name != 'id')
+
+    q = select(columns).select_from(
+            cve.join(table, table.c.id == cve.c.id).join(users, users.c.id == cve.c.user_id)
+            ).where(cve.c.dc == dc).order_by(cve.c.name.asc())
+
+    children = _child_tables(model)
+
+    conn = engine.connect()
+
+    try:
+        result = conn.execution_options(stream_results=True).execute(q)
+
+        while True:
+            rows = result.fetchmany(batch_size)
+
+            if not rows:
+                break
+
+            cves = [dict(row) for row in rows]
+            ids = [row['id'] for row in cves]
+
+            for (name, ctable, fk, ccolumns, uselist) in children:
+                found = dict((cid, []) for cid in ids)
+                q = select([fk] + ccolumns).where(fk.in_(ids))
+
+                if 'id' in ctable.c:
+                    q = q.order_by(ctable.c.id)
+
+                for child in conn.execute(q):
+                    found[child[0]].append(dict((c.name, child[c.name]) for c in ccolumns))
+
+                for row in cves:
+                    if uselist:
+                        row[name] = found[row['id']]
+                    else:
+                        row[name] = found[row['id']][0] if found[row['id']] else None
+
+            counts = dict(conn.execute(select([tickets.c.cve_id, func.count(tickets.c.id)]).where(tickets.c.cve_id.in_(ids)).group_by(tickets.c.cve_id)).fetchall())
+
+            for row in cves:
+                row['status'] = status_types.get(row['status'], row['status'])
+                row['tickets'] = counts.get(row['id'], 0)
+                yield row
+
+        result.close()
+    finally:
+        conn.close()
+
+def jsonl_lines(rows):
+    for row in rows:
+        yield json.dumps(row) + '\n'
+
+def _csv_value(value):
+    if isinstance(value, (list, dict)):
+        value = json.dumps(value)
+
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+
+    if value is None:
+        return ''
+
+    return value
+
+def csv_lines(rows, names):
+    """
+    Generates the lines of a CSV file containing `rows`, the child collections
+    are stored as JSON in a single column.
+    """
+
+    buf = StringIO()
+    writer = csv.writer(buf)
+
+    writer.writerow(names)
+
+    for row in rows:
+        writer.writerow([_csv_value(row[name]) for name in names])
+        yield buf.getvalue()
+
+        buf.seek(0)
+        buf.truncate()
@@ -60,7 +60,13 @@ def deferred_event_verify_name_not_used(node, kw):
             if kw.get('origname') == value.lower():
                 return
 
-        if m.CVEBase.find(type, value) != None:
+        # Names only have to be unique within a DEF CON
+        if 'dc' in kw:
+            taken = m.CVEBase.name_taken(kw['dc'], type, value)
+        else:
+            taken = m.CVEBase.find(type, value) != None
+
+        if taken:
             raise colander.Invalid(node, msg='Name already exists, please choose a different name.')
 
     return event_verify_name_not_used
@@ -0,0 +1,97 @@
+# File: listing.py
+# Author: Bert JW Regeer <bertjw@regeer.org>
+# Created: 2026-10-18
+
+import datetime
+import hashlib
+
+from pyramid.httpexceptions import HTTPNotModified
+from pyramid.renderers import render
+
+from cache import delete_after_commit
+from cvetypes import cve_types
+
+def _listing_key(dc, type):
+    return ('listing', int(dc), type)
+
+def published_listing(request, dc, type):
+    """
+    Returns the rendered listing of the published CVE's of `type` for a DEF CON
+
+    The listing is rendered once and stored in the listing cache until it is
+    invalidated, or expires. Returns a dictionary containing the rendered
+    'html', the amount of CVE's in 'count' and the 'etag' and 'last_modified'
+    for the rendered html.
+    """
+
+    cache = request.registry.listing_cache
+    key = _listing_key(dc, type)
+    listing = cache.get(key)
+
+    if listing is not None:
+        return listing
+
+    cvetype = cve_types[type]
+
+    cves = []
+    for cve in cvetype.model.find_published(dc):
+        e = cve.to_appstruct()
+        e['url'] = request.route_url(cvetype.route, traverse=(cve.dc, cve.id))
+        cves.append(e)
+
+    html = render('cve/listing.mako', {'events': cves}, request=request)
+
+    listing = {
+            'html': html,
+            'count': len(cves),
+            'etag': hashlib.sha1(html.encode('utf-8')).hexdigest(),
+            'last_modified': datetime.datetime.utcnow(),
+            }
+
+    cache.set(key, listing)
+    return listing
+
+# The fields of a CVE that are shown on (or decide what is in) the listing
+listing_fields = frozenset(['dc', 'name', 'description', 'website', 'status'])
+
+def listing_changed(cve, changes):
+    """
+    Returns True if the `changes` made to `cve` (see CVEBase.from_appstruct)
+    change the published listing it is (or was) part of.
+    """
+
+    if listing_fields.isdisjoint(changes):
+        return False
+
+    return cve.status == 5 or 'status' in changes
+
+def invalidate_listing(request, dc, type):
+    # Remove it (again) after the commit, so that the listing isn't rendered
+    # and cached from the rows as they were before this transaction
+    delete_after_commit(request.registry.listing_cache, _listing_key(dc, type))
+
+def conditional_listing(request, listing):
+    """
+    Set the ETag and Last-Modified for a page containing `listing`
+
+    The ETag includes the current user, since the rest of the page depends on
+    whether the user is logged in. Returns a HTTPNotModified if the client
+    already has the current version of the page, None otherwise.
+    """
+
+    etag = listing['etag']
+
+    if request.user.username is not None:
+        etag = hashlib.sha1('{}:{}'.format(etag, request.user.username.encode('utf-8'))).hexdigest()
+
+    if etag in request.if_none_match:
+        return HTTPNotModified(etag=etag, last_modified=listing['last_modified'])
+
+    response = request.response
+    response.etag = etag
+    response.last_modified = listing['last_modified']
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.conditional_response = True
+
+    return None
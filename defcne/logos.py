@@ -0,0 +1,242 @@
+# File: logos.py
+# Author: Bert JW Regeer <bertjw@regeer.org>
+# Created: 2026-10-18
+
+import logging
+log = logging.getLogger(__name__)
+
+import errno
+import hashlib
+import os
+import os.path
+import re
+import tempfile
+import time
+
+try:
+    from PIL import Image
+except ImportError: # pragma: no cover
+    Image = None
+
+_ext_re = re.compile(r'^\.[a-z0-9]{1,5}$')
+
+# mkstemp() creates files that only we can read, logos may be served by a
+# different user (the web server) so they get the usual permissions instead.
+# The umask can only be read by setting it, so that is done once at startup.
+_umask = os.umask(0)
+os.umask(_umask)
+_file_mode = 0o644 & ~_umask
+
+class LogoStore(object):
+    """
+    Content addressed storage for uploaded logos
+
+    Logos are stored under `path` by the sha256 of their contents, so that
+    uploading the same image again does not create a new copy. Uploads are
+    streamed to a temporary file in the same directory tree and renamed into
+    place, so a logo is either complete or not there at all.
+
+    Logos are referenced from CVEBase.logo by the path returned from save(),
+    logos that are no longer referenced are removed by `orphans()` and
+    `delete()` (see the defcne_purge_logos script).
+
+    If Pillow is installed, resized copies of a logo (derivatives) that fit
+    within `sizes` pixels are created when it is uploaded, or the first time
+    they are asked for. Derivatives are stored under d/<size>/ and are named
+    after the logo they were made from, so they never change.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(self, path, sizes=()):
+        self.path = path
+        self.tmp_path = os.path.join(path, 'tmp')
+        self.sizes = sizes
+
+    def _makedirs(self, path):
+        try:
+            os.makedirs(path)
+        except OSError, e:
+            if e.errno != errno.EEXIST:
+                raise
+
+    def _filename(self, logo):
+        return os.path.join(self.path, *logo.lstrip('/').split('/'))
+
+    def save(self, fp, filename):
+        """
+        Store the contents of the file object `fp`, returns the path of the
+        logo relative to the store (with a leading /).
+        """
+
+        ext = os.path.splitext(filename)[1].lower()
+
+        if not _ext_re.match(ext):
+            ext = ''
+
+        self._makedirs(self.tmp_path)
+
+        digest = hashlib.sha256()
+        (fd, tmp) = tempfile.mkstemp(dir=self.tmp_path)
+
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                fp.seek(0)
+
+                while True:
+                    chunk = fp.read(self.chunk_size)
+
+                    if not chunk:
+                        break
+
+                    digest.update(chunk)
+                    f.write(chunk)
+
+            digest = digest.hexdigest()
+            logo = '/{}/{}/{}{}'.format(digest[:2], digest[2:4], digest, ext)
+            logo_save = self._filename(logo)
+
+            if os.path.exists(logo_save):
+                # Already have this one, touch it so that it is not removed as
+                # an orphan before the new reference has been committed
+                os.utime(logo_save, None)
+                os.unlink(tmp)
+            else:
+                self._makedirs(os.path.dirname(logo_save))
+                os.chmod(tmp, _file_mode)
+                os.rename(tmp, logo_save)
+        except:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+        for size in self.sizes:
+            self.derivative(logo, size)
+
+        return logo
+
+    def _derivative_name(self, logo, size):
+        name = os.path.basename(logo)
+        ext = '.png' if os.path.splitext(name)[1] in ('.png', '.gif') else '.jpg'
+        return '/d/{}/{}{}'.format(size, name, ext)
+
+    def derivative(self, logo, size):
+        """
+        Returns the path (relative to the store) of a copy of `logo` that fits
+        within `size` by `size` pixels, creating it if it does not exist yet.
+        Returns None if the derivative can't be created, in which case the
+        original should be used.
+        """
+
+        if Image is None:
+            return None
+
+        derived = self._derivative_name(logo, size)
+        derived_save = self._filename(derived)
+
+        if os.path.exists(derived_save):
+            return derived
+
+        try:
+            image = Image.open(self._filename(logo))
+            image.thumbnail((size, size), Image.ANTIALIAS)
+
+            if derived.endswith('.png'):
+                fmt = 'PNG'
+                options = {'optimize': True}
+            else:
+                fmt = 'JPEG'
+                options = {'quality': 85, 'optimize': True, 'progressive': True}
+
+                if image.mode != 'RGB':
+                    image = image.convert('RGB')
+
+            self._makedirs(self.tmp_path)
+            self._makedirs(os.path.dirname(derived_save))
+            (fd, tmp) = tempfile.mkstemp(dir=self.tmp_path)
+
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    image.save(f, fmt, **options)
+
+                os.chmod(tmp, _file_mode)
+                os.rename(tmp, derived_save)
+            except:
+                if os.path.exists(tmp):
+                    os.unlink(tmp)
+                raise
+        except (IOError, OSError), e:
+            log.warn('Unable to create {}px derivative of logo {}: {}'.format(size, logo, e))
+            return None
+
+        return derived
+
+    def delete(self, logo):
+        filename = self._filename(logo)
+
+        try:
+            os.unlink(filename)
+        except OSError, e:
+            if e.errno != errno.ENOENT:
+                raise
+
+        # Remove the directories that are now empty, up to the store itself
+        dirname = os.path.dirname(filename)
+
+        while dirname != self.path and dirname.startswith(self.path):
+            try:
+                os.rmdir(dirname)
+            except OSError:
+                break
+
+            dirname = os.path.dirname(dirname)
+
+    def orphans(self, referenced, grace=3600):
+        """
+        Returns the logos (and left over temporary files) that are not in
+        `referenced` and have not been touched for at least `grace` seconds,
+        so that logos whose reference has not yet been committed are kept.
+        """
+
+        cutoff = time.time() - grace
+        orphans = []
+
+        # Derivatives are kept for as long as the logo they were made from
+        names = set(os.path.basename(logo) for logo in referenced)
+
+        for (dirpath, dirnames, filenames) in os.walk(self.path):
+            for filename in filenames:
+                full = os.path.join(dirpath, filename)
+                logo = '/' + os.path.relpath(full, self.path).replace(os.sep, '/')
+
+                if logo in referenced:
+                    continue
+
+                if logo.startswith('/d/') and os.path.splitext(filename)[0] in names:
+                    continue
+
+                if os.path.getmtime(full) > cutoff:
+                    continue
+
+                orphans.append(logo)
+
+        return orphans
+
+def logo_url(request, logo, size=None):
+    """
+    Returns the URL for `logo`, or for the derivative of `size` pixels if one
+    is available. Returns an empty string if there is no logo.
+    """
+
+    if not logo:
+        return ''
+
+    store = request.registry.logo_store
+
+    if size is not None:
+        derived = store.derivative(logo, size)
+
+        if derived is not None:
+            return request.static_url(store.path + derived)
+
+    return request.static_url(store.path + logo)
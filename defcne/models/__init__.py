@@ -19,6 +19,7 @@ from cvebase import (
         WiredInternet,
         AccessPoint,
         Badges,
+        sync_collection,
         )
 
 from event import (
@@ -41,3 +42,16 @@ from tickets import (
         Ticket,
         )
 
+from history import (
+        CVEHistory,
+        )
+
+from search import (
+        create_search_index,
+        search_cves,
+        )
+
+
+from mail import (
+        MailOutbox,
+        )
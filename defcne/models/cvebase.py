@@ -18,16 +18,116 @@ from sqlalchemy import (
         Unicode,
         UnicodeText,
         and_,
+        bindparam,
+        exists,
+        func,
         )
 
 from sqlalchemy.orm import (
         contains_eager,
+        joinedload,
+        load_only,
         noload,
         relationship,
+        subqueryload,
         )
 
 from sqlalchemy.ext.hybrid import hybrid_property
 
+from zope.sqlalchemy import mark_changed
+
+def _child_id(item):
+    try:
+        return int(item.get('id'))
+    except (TypeError, ValueError):
+        return -1
+
+def set_changed(obj, changes, field, value):
+    """
+    Set `field` on `obj` to `value` if it is different from the current value,
+    and record the change in `changes` as [old, new].
+    """
+
+    old = getattr(obj, field)
+
+    if old != value:
+        changes[field] = [old, value]
+        setattr(obj, field, value)
+
+def sync_collection(model, cve_id, current, appstructs):
+    """
+    Reconcile the rows of the child table `model` that belong to `cve_id`
+    (`current`, as loaded) with the list of `appstructs` from a form.
+
+    Existing rows are matched by id, items without a known id are inserted,
+    rows that are no longer listed are deleted, and only rows whose values
+    changed are updated. Each of those is a single (executemany) statement.
+    The columns that are synced are listed in `model.__fields__`.
+
+    Returns the changes that were made as a dictionary containing the
+    'added' values, the 'updated' rows (the id and [old, new] of each field
+    that changed) and the 'deleted' ids. Empty if nothing was changed.
+    """
+
+    table = model.__table__
+    fields = model.__fields__
+    existing = dict((row.id, row) for row in current)
+
+    seen = set()
+    inserts = []
+    updates = []
+    changes = {}
+
+    for item in appstructs:
+        values = dict((field, item[field]) for field in fields)
+        cid = _child_id(item)
+        row = existing.get(cid)
+
+        if row is None or cid in seen:
+            values['cve_id'] = cve_id
+            inserts.append(values)
+            continue
+
+        seen.add(cid)
+
+        changed = dict((field, [getattr(row, field), value]) for (field, value) in values.items() if getattr(row, field) != value)
+
+        if changed:
+            update = dict(('_' + field, value) for (field, value) in values.items())
+            update['_id'] = cid
+            updates.append(update)
+
+            changed['id'] = cid
+            changes.setdefault('updated', []).append(changed)
+
+    deletes = sorted(set(existing) - seen)
+
+    if deletes:
+        DBSession.execute(table.delete().where(table.c.id.in_(deletes)))
+        changes['deleted'] = deletes
+
+    if updates:
+        DBSession.execute(table.update().where(table.c.id == bindparam('_id')).values(
+            dict((field, bindparam('_' + field)) for field in fields)), updates)
+
+    if inserts:
+        DBSession.execute(table.insert(), inserts)
+        changes['added'] = [dict((field, insert[field]) for field in fields) for insert in inserts]
+
+    if changes:
+        # The rows were changed behind the ORM's back: drop the deleted rows
+        # from the session, reload the updated ones if they are used again,
+        # and tell the transaction manager there is something to commit.
+        for cid in deletes:
+            DBSession.expunge(existing[cid])
+
+        for update in updates:
+            DBSession.expire(existing[update['_id']])
+
+        mark_changed(DBSession())
+
+    return changes
+
 status_types = {
         0: u'Pending',
         1: u'Under Review',
@@ -59,6 +159,7 @@ class CVEBase(Base):
             Column('status', Integer, default=0),
 
             UniqueConstraint('dc', 'type', 'name'),
+            Index('ix_cve_dc_type_status_name', 'dc', 'type', 'status', 'name'),
             )
 
     CheckConstraint(__table__.c.status.in_(status_types.keys()))
@@ -72,6 +173,9 @@ class CVEBase(Base):
     pocs = relationship("POC")
     tickets = relationship("Ticket")
 
+    # The relationships that to_appstruct() requires, sub-classes add their own
+    __listing_relations__ = ('owner', 'pocs')
+
     _name = __table__.c.name
 
     @hybrid_property
@@ -84,40 +188,66 @@ class CVEBase(Base):
         self._name = value.lower()
 
     def from_appstruct(self, appstruct):
+        """
+        Update the CVE from the appstruct of a form, only the fields and
+        children that are different are changed.
+
+        Returns a dictionary of the changes, containing [old, new] for each
+        field and the result of sync_collection() for each collection.
+        """
+
         if 'id' in appstruct:
             if appstruct['id'] != self.id:
                 print "ID in appstruct does not match: {} - {}".format(type(appstruct['id']), type(self.id))
                 raise ValueError
 
+        changes = {}
+
         if 'dc' in appstruct:
-            self.dc = appstruct['dc']
+            set_changed(self, changes, 'dc', appstruct['dc'])
 
-        self.name = appstruct['name']
-        self.oneliner = appstruct['oneliner']
-        self.description = appstruct['description']
-        self.website = appstruct['website']
+        if self.disp_name != appstruct['name']:
+            changes['name'] = [self.disp_name, appstruct['name']]
+            self.name = appstruct['name']
+
+        set_changed(self, changes, 'oneliner', appstruct['oneliner'])
+        set_changed(self, changes, 'description', appstruct['description'])
+        set_changed(self, changes, 'website', appstruct['website'])
 
         if 'logo_path' in appstruct:
-            self.logo = appstruct['logo_path']
+            set_changed(self, changes, 'logo', appstruct['logo_path'])
 
-        new_poc_ids = set([p['id'] for p in appstruct['pocs'] if p['id'] != -1])
-        cur_poc_ids = set([p.id for p in self.pocs])
-        del_poc_ids = cur_poc_ids - new_poc_ids
+        self.sync_children(changes, 'pocs', appstruct['pocs'])
 
-        if len(del_poc_ids):
-            for poc in self.pocs:
-                if poc.id in del_poc_ids:
-                    DBSession.delete(poc)
+        return changes
 
-        for poc in appstruct['pocs']:
-            if poc['id'] in cur_poc_ids:
-                cur_poc = [p for p in self.pocs if p.id == poc['id']][0]
-                cur_poc.from_appstruct(poc)
-            else:
-                npoc = POC()
-                npoc.from_appstruct(poc)
-                self.pocs.append(npoc)
+    def sync_children(self, changes, name, appstructs):
+        """
+        Make the collection `name` match `appstructs`, recording what was
+        changed in `changes`. For a CVE that has not been flushed yet the
+        children are simply added, otherwise the changes are applied with
+        sync_collection().
+        """
+
+        model = self.__mapper__.relationships[name].mapper.class_
+
+        if self.id is None:
+            for item in appstructs:
+                child = model()
+                child.from_appstruct(item)
+                getattr(self, name).append(child)
+
+            if appstructs:
+                changes[name] = {'added': [dict((field, item[field]) for field in model.__fields__) for item in appstructs]}
 
+            return
+
+        changed = sync_collection(model, self.id, getattr(self, name), appstructs)
+
+        # The collection was changed behind the ORM's back as well
+        if changed:
+            changes[name] = changed
+            DBSession.expire(self, [name])
 
     def to_appstruct(self):
         return {
@@ -133,10 +263,145 @@ class CVEBase(Base):
                 'pocs': [poc.to_appstruct() for poc in self.pocs]
                 }
 
+    @classmethod
+    def listing(cls, dc, status=None, columns=None, relations=None):
+        """
+        Query all of the CVE's of this type for a DEF CON ordered by name
+
+        Instead of lazily loading each relationship for each row, the owner is
+        joined and the collections are each loaded in a single batched query,
+        so the amount of queries doesn't depend on the amount of rows.
+
+        `columns` limits the columns that are loaded to those that are listed
+        (by attribute name), `relations` limits the relationships that are
+        loaded, by default everything required by to_appstruct() is loaded.
+        """
+
+        q = DBSession.query(cls).filter(cls.dc == dc).order_by(cls.name.asc())
+
+        # Filter on type explicitly so that ix_cve_dc_type_status_name is used
+        if cls.__mapper__.polymorphic_identity != 'cve':
+            q = q.filter(cls.type == cls.__mapper__.polymorphic_identity)
+
+        if status is not None:
+            q = q.filter(cls.status == status)
+
+        if columns is not None:
+            q = q.options(load_only(*columns))
+
+        if relations is None:
+            relations = cls.__listing_relations__
+
+        for rel in relations:
+            if rel == 'owner':
+                q = q.options(joinedload(rel))
+            else:
+                q = q.options(subqueryload(rel))
+
+        return q
+
+    @classmethod
+    def find_cve(cls, dc, id, relations=None):
+        """
+        Returns the CVE of this type with `id` for a DEF CON, or None
+
+        The owner is joined, and the relationships in `relations` (by default
+        everything required by to_appstruct()) are each loaded with a single
+        query, rather than joining them all, which would return the product
+        of all of the collections.
+        """
+
+        q = DBSession.query(cls).filter(cls.id == id, cls.dc == dc).options(joinedload('owner'))
+
+        if relations is None:
+            relations = cls.__listing_relations__
+
+        for rel in relations:
+            if rel != 'owner':
+                q = q.options(subqueryload(rel))
+
+        return q.first()
+
+    @classmethod
+    def find_published(cls, dc, page=None, per_page=50, relations=None):
+        """
+        Returns the published CVE's of this type for a DEF CON, ordered by name.
+
+        If `page` is given (starting at 0) only `per_page` CVE's are returned
+        for that page.
+        """
+
+        q = cls.listing(dc, status=5, relations=relations)
+
+        if page is not None:
+            q = q.offset(page * per_page).limit(per_page)
+
+        return q.all()
+
+    @classmethod
+    def count_published(cls, dc):
+        q = DBSession.query(func.count(cls.id)).filter(cls.dc == dc, cls.status == 5)
+
+        if cls.__mapper__.polymorphic_identity != 'cve':
+            q = q.filter(cls.type == cls.__mapper__.polymorphic_identity)
+
+        return q.scalar()
+
+    @classmethod
+    def set_status(cls, dc, ids, status):
+        """
+        Set the status of the CVE's of this type with `ids` for a DEF CON to
+        `status` using a single UPDATE.
+
+        Returns a list of (id, old status) for the CVE's that were changed,
+        CVE's that already had `status` are left alone. The rows are locked
+        until the end of the transaction so that the old status is accurate.
+        """
+
+        if not ids:
+            return []
+
+        q = DBSession.query(cls.id, cls.status).filter(cls.dc == dc, cls.id.in_(ids), cls.status != status)
+
+        if cls.__mapper__.polymorphic_identity != 'cve':
+            q = q.filter(cls.type == cls.__mapper__.polymorphic_identity)
+
+        changed = q.with_for_update().all()
+
+        if changed:
+            table = CVEBase.__table__
+            DBSession.execute(table.update().where(table.c.id.in_([cid for (cid, _) in changed])).values(status=status))
+
+            # Core statements don't tell the transaction manager there is
+            # something to commit
+            mark_changed(DBSession())
+
+        return changed
+
+    @classmethod
+    def logos_in_use(cls):
+        """
+        Returns the set of logos that are referenced by any CVE
+        """
+
+        return set(logo for (logo,) in DBSession.query(cls.logo).filter(cls.logo != None).distinct())
+
     @classmethod
     def find(cls, type, value):
         return DBSession.query(cls).filter(cls.type == type, cls.name == value.lower()).first()
 
+    @classmethod
+    def name_taken(cls, dc, type, value):
+        """
+        Returns True if there is a CVE of `type` named `value` for a DEF CON,
+        answered from the (dc, type, name) unique index alone.
+        """
+
+        table = CVEBase.__table__
+        q = exists().where(and_(table.c.dc == dc, table.c.type == type, table.c.name == value.lower()))
+
+        return DBSession.query(q).scalar()
+
 
 class POC(Base):
     __table__ = Table('cve_pocs', Base.metadata,
@@ -147,6 +412,8 @@ class POC(Base):
             Column('cellphone', Unicode),
             )
 
+    __fields__ = ('name', 'email', 'cellphone')
+
     def from_appstruct(self, appstruct):
         self.name = appstruct['name']
         self.email = appstruct['email']
@@ -171,6 +438,8 @@ class Power(Base):
             Column('threephase', Boolean),
             )
 
+    __fields__ = ('outlets', 'justification', 'threephase')
+
     def from_appstruct(self, appstruct):
         self.outlets = appstruct['outlets']
         self.justification = appstruct['justification']
@@ -192,6 +461,8 @@ class WiredInternet(Base):
             Column('justification', Unicode),
             )
 
+    __fields__ = ('justification',)
+
     def from_appstruct(self, appstruct):
         self.justification = appstruct['justification']
 
@@ -212,6 +483,8 @@ class AccessPoint(Base):
             Column('ssid', Unicode),
             )
 
+    __fields__ = ('hwmac', 'apbrand', 'ssid')
+
     def from_appstruct(self, appstruct):
         self.hwmac = appstruct['hwmac']
         self.apbrand = appstruct['apbrand']
@@ -237,6 +510,8 @@ class Badges(Base):
             )
     CheckConstraint(__table__.c.type.in_(badge_types.keys()))
 
+    __fields__ = ('type', 'amount', 'reason')
+
     def from_appstruct(self, appstruct):
         self.type = appstruct['type']
         self.amount = appstruct['amount']
@@ -250,3 +525,52 @@ class Badges(Base):
                 'amount': self.amount,
                 'reason': self.reason,
                 }
+
+    @classmethod
+    def totals(cls, dc, statuses=(4, 5), types=None):
+        """
+        Aggregate the badges for all CVE's for a DEF CON
+
+        This is a single GROUP BY over the badges for each CVE and badge type.
+        Returns a tuple of a list of CVE's (with a dictionary of badge type to
+        amount in 'badges') and a dictionary of badge type to total amount.
+        CVE's without any badges are included with empty badges.
+        """
+
+        cve = CVEBase.__table__
+        badges = cls.__table__
+        contests = Base.metadata.tables['contests']
+
+        q = DBSession.query(cve.c.id, cve.c.type, cve.c.dc, cve.c.disp_name, cve.c.status, contests.c.blackbadge, badges.c.type, func.sum(badges.c.amount))
+        q = q.select_from(cve).outerjoin(badges, badges.c.cve_id == cve.c.id).outerjoin(contests, contests.c.id == cve.c.id)
+        q = q.filter(cve.c.dc == dc)
+
+        if statuses is not None:
+            q = q.filter(cve.c.status.in_(statuses))
+
+        if types is not None:
+            q = q.filter(cve.c.type.in_(types))
+
+        q = q.group_by(cve.c.id, cve.c.type, cve.c.dc, cve.c.disp_name, cve.c.status, contests.c.blackbadge, badges.c.type)
+        q = q.order_by(cve.c.type, cve.c.disp_name, cve.c.id)
+
+        cves = []
+        totals = dict((btype, 0) for btype in badge_types.keys())
+
+        for (cve_id, cve_type, cve_dc, disp_name, status, blackbadge, btype, amount) in q:
+            if len(cves) == 0 or cves[-1]['id'] != cve_id:
+                cves.append({
+                    'id': cve_id,
+                    'type': cve_type,
+                    'dc': cve_dc,
+                    'disp_name': disp_name,
+                    'status': status,
+                    'blackbadge': bool(blackbadge),
+                    'badges': {},
+                    })
+
+            if btype is not None:
+                cves[-1]['badges'][btype] = amount or 0
+                totals[btype] = totals.get(btype, 0) + (amount or 0)
+
+        return (cves, totals)
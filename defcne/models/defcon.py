@@ -33,8 +33,13 @@ class Defcon(Base):
         return DBSession.query(cls).filter(cls.id == num).first()
 
     @classmethod
-    def find_defcon_events(cls, num):
-        l = DBSession.query(cls).filter(cls.id == num).join(cls.cve).filter(CVEBase.type == 'event').options(contains_eager('cve')).all()
+    def find_defcon_events(cls, num, status=None):
+        q = DBSession.query(cls).filter(cls.id == num).join(cls.cve).filter(CVEBase.type == 'event')
+
+        if status is not None:
+            q = q.filter(CVEBase.status == status)
+
+        l = q.order_by(CVEBase.name.asc()).options(contains_eager('cve')).all()
 
         if len(l) == 0:
             return None
@@ -42,8 +47,13 @@ class Defcon(Base):
         return l[0]
 
     @classmethod
-    def find_defcon_contests(cls, num):
-        l = DBSession.query(cls).filter(cls.id == num).join(cls.cve).filter(CVEBase.type == 'contest').options(contains_eager('cve')).all()
+    def find_defcon_contests(cls, num, status=None):
+        q = DBSession.query(cls).filter(cls.id == num).join(cls.cve).filter(CVEBase.type == 'contest')
+
+        if status is not None:
+            q = q.filter(CVEBase.status == status)
+
+        l = q.order_by(CVEBase.name.asc()).options(contains_eager('cve')).all()
 
         if len(l) == 0:
             return None
@@ -51,8 +61,13 @@ class Defcon(Base):
         return l[0]
 
     @classmethod
-    def find_defcon_villages(cls, num):
-        l = DBSession.query(cls).filter(cls.id == num).join(cls.cve).filter(CVEBase.type == 'village').options(contains_eager('cve')).all()
+    def find_defcon_villages(cls, num, status=None):
+        q = DBSession.query(cls).filter(cls.id == num).join(cls.cve).filter(CVEBase.type == 'village')
+
+        if status is not None:
+            q = q.filter(CVEBase.status == status)
+
+        l = q.order_by(CVEBase.name.asc()).options(contains_eager('cve')).all()
 
         if len(l) == 0:
             return None
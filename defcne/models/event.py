@@ -28,7 +28,10 @@ from sqlalchemy.orm import (
         )
 
 from sqlalchemy.ext.hybrid import hybrid_property
-from cvebase import CVEBase
+from cvebase import (
+        CVEBase,
+        set_changed,
+        )
 
 
 class EventSpace(Base):
@@ -42,11 +45,15 @@ class EventSpace(Base):
             )
 
     def from_appstruct(self, appstruct):
-        self.tables = appstruct['tables']
-        self.chairs = appstruct['chairs']
-        self.stage = appstruct['stage']
-        self.location = appstruct['location']
-        self.mobilebar = appstruct['mobilebar']
+        changes = {}
+
+        set_changed(self, changes, 'tables', appstruct['tables'])
+        set_changed(self, changes, 'chairs', appstruct['chairs'])
+        set_changed(self, changes, 'stage', appstruct['stage'])
+        set_changed(self, changes, 'location', appstruct['location'])
+        set_changed(self, changes, 'mobilebar', appstruct['mobilebar'])
+
+        return changes
 
     def to_appstruct(self):
         return {
@@ -73,20 +80,26 @@ class Event(CVEBase):
 
     space = relationship("EventSpace", uselist=False)
 
+    __listing_relations__ = CVEBase.__listing_relations__ + ('space',)
+
     def from_appstruct(self, appstruct):
-        super(Event, self).from_appstruct(appstruct)
+        changes = super(Event, self).from_appstruct(appstruct)
+
+        set_changed(self, changes, 'onsite', appstruct['onsite'])
+        set_changed(self, changes, 'official', appstruct['official'])
+        set_changed(self, changes, 'security', appstruct['security'])
+        set_changed(self, changes, 'signage', appstruct['signage'])
+
+        if self.onsite:
+            if self.space is None:
+                self.space = EventSpace()
 
-        self.onsite = appstruct['onsite']
-        self.official = appstruct['official']
-        self.security = appstruct['security']
-        self.signage = appstruct['signage']
+            space = self.space.from_appstruct(appstruct['space'])
 
-        if self.onsite and self.space is None:
-            self.space = EventSpace()
-            self.space.from_appstruct(appstruct['space'])
+            if space:
+                changes['space'] = space
 
-        if self.onsite and self.space:
-            self.space.from_appstruct(appstruct['space'])
+        return changes
 
     def to_appstruct(self):
         ret = super(Event, self).to_appstruct()
@@ -22,6 +22,12 @@ from sqlalchemy.orm import (
 
 from user import User
 
+from ..cache import MemoryCache
+
+# Email addresses per group change rarely, this saves a query for every staff
+# notification that is sent out.
+_email_cache = MemoryCache(maxsize=64, ttl=60)
+
 class Group(Base):
     __table__ = Table('groups', Base.metadata,
             Column('id', Integer, primary_key=True, unique=True),
@@ -39,6 +45,33 @@ class Group(Base):
     def find_group_by_id(cls, id):
         return DBSession.query(cls).get(id)
 
+    @classmethod
+    def find_emails(cls, *names):
+        """
+        Returns the email addresses of the members of the groups in `names`
+
+        Only the email column is selected, through the user_groups table, so
+        that no User objects (and their groups) have to be loaded.
+        """
+
+        key = tuple(sorted(names))
+        emails = _email_cache.get(key)
+
+        if emails is not None:
+            return emails
+
+        q = DBSession.query(User.email).join(UserGroups, UserGroups.userid == User.id).join(cls, cls.id == UserGroups.groupid)
+        q = q.filter(cls.name.in_(names)).distinct()
+
+        emails = [email for (email,) in q.yield_per(100)]
+        _email_cache.set(key, emails)
+
+        return emails
+
+    @classmethod
+    def invalidate_emails(cls):
+        _email_cache.clear()
+
 
 class UserGroups(Base):
     __table__ = Table('user_groups', Base.metadata,
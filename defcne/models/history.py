@@ -0,0 +1,105 @@
+# File: history.py
+# Author: Bert JW Regeer <bertjw@regeer.org>
+# Created: 2026-10-18
+
+import datetime
+import json
+
+from meta import Base
+from meta import DBSession
+
+from sqlalchemy import (
+        Column,
+        DateTime,
+        ForeignKey,
+        Index,
+        Integer,
+        Table,
+        UnicodeText,
+        func,
+        )
+
+from sqlalchemy.orm import (
+        joinedload,
+        relationship,
+        )
+
+from zope.sqlalchemy import mark_changed
+
+class CVEHistory(Base):
+    """
+    Audit log of the changes made to CVE's
+
+    Every entry records who changed a CVE and when, and what was changed as a
+    JSON object of {field: [old, new]}.
+    """
+
+    __table__ = Table('cve_history', Base.metadata,
+            Column('id', Integer, primary_key=True, unique=True),
+            Column('cve_id', Integer, ForeignKey('cve.id', onupdate="CASCADE", ondelete="CASCADE"), nullable=False),
+            Column('user_id', Integer, ForeignKey('users.id', onupdate="CASCADE", ondelete="SET NULL")),
+            Column('created', DateTime, default=datetime.datetime.utcnow, nullable=False),
+            Column('changes', UnicodeText, nullable=False),
+
+            Index('ix_cve_history_cve_id_created', 'cve_id', 'created'),
+            )
+
+    user = relationship("User")
+
+    @property
+    def diff(self):
+        return json.loads(self.changes)
+
+    @classmethod
+    def record(cls, cve_id, user_id, changes):
+        """
+        Add an entry for the `changes` (see CVEBase.from_appstruct) made to a
+        CVE by `user_id`.
+        """
+
+        entry = cls(cve_id=cve_id, user_id=user_id, changes=unicode(json.dumps(changes, sort_keys=True)))
+        DBSession.add(entry)
+        return entry
+
+    @classmethod
+    def record_many(cls, user_id, changes):
+        """
+        Add an entry for each (cve_id, {field: [old, new]}) in `changes` using
+        a single INSERT.
+        """
+
+        if not changes:
+            return
+
+        now = datetime.datetime.utcnow()
+
+        DBSession.execute(cls.__table__.insert(), [
+            {
+                'cve_id': cve_id,
+                'user_id': user_id,
+                'created': now,
+                'changes': unicode(json.dumps(diff, sort_keys=True)),
+            } for (cve_id, diff) in changes])
+
+        mark_changed(DBSession())
+
+    @classmethod
+    def find_history(cls, cve_id, page=None, per_page=20):
+        """
+        Returns the history of a CVE, newest first, with the users that made
+        the changes loaded in the same query.
+
+        If `page` is given (starting at 0) only `per_page` entries are returned
+        for that page.
+        """
+
+        q = DBSession.query(cls).filter(cls.cve_id == cve_id).options(joinedload('user')).order_by(cls.created.desc(), cls.id.desc())
+
+        if page is not None:
+            q = q.offset(page * per_page).limit(per_page)
+
+        return q.all()
+
+    @classmethod
+    def count_history(cls, cve_id):
+        return DBSession.query(func.count(cls.id)).filter(cls.cve_id == cve_id).scalar()
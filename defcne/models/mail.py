@@ -0,0 +1,159 @@
+# File: mail.py
+# Author: Bert JW Regeer <bertjw@regeer.org>
+# Created: 2026-10-18
+
+import datetime
+
+from meta import Base
+from meta import DBSession
+
+from sqlalchemy import (
+        Boolean,
+        Column,
+        DateTime,
+        Index,
+        Integer,
+        Table,
+        Unicode,
+        UnicodeText,
+        func,
+        )
+
+from pyramid_mailer.message import Message
+
+from zope.sqlalchemy import mark_changed
+
+class MailOutbox(Base):
+    """
+    Outgoing email that has not yet been delivered
+
+    Messages are added to the outbox as part of the request's transaction, and
+    are delivered by the defcne_mail_queue script. This means email is only
+    sent if the transaction commits, and the request does not have to wait for
+    the SMTP server.
+    """
+
+    __table__ = Table('mail_outbox', Base.metadata,
+            Column('id', Integer, primary_key=True, unique=True),
+            Column('sender', Unicode(256), nullable=False),
+            Column('recipients', UnicodeText, nullable=False), # newline separated
+            Column('subject', Unicode, nullable=False),
+            Column('body', UnicodeText, nullable=False),
+            Column('created', DateTime, default=datetime.datetime.utcnow, nullable=False),
+            Column('next_attempt', DateTime, default=datetime.datetime.utcnow, nullable=False),
+            Column('attempts', Integer, default=0, nullable=False),
+            Column('last_error', Unicode),
+            Column('sent', DateTime),
+            Column('failed', Boolean, default=False, nullable=False),
+
+            Index('ix_mail_outbox_pending', 'sent', 'failed', 'next_attempt'),
+            )
+
+    @classmethod
+    def enqueue(cls, message):
+        """
+        Add `message` to the outbox. A message without recipients could never
+        be delivered, so it is refused with a ValueError.
+        """
+
+        if not message.recipients:
+            raise ValueError('Refusing to queue a message without recipients: {}'.format(message.subject))
+
+        mail = cls(
+                sender=message.sender,
+                recipients=u'\n'.join(message.recipients),
+                subject=message.subject,
+                body=message.body,
+                )
+        DBSession.add(mail)
+        return mail
+
+    def message(self):
+        return Message(subject=self.subject, sender=self.sender, recipients=self.recipients.split(u'\n'), body=self.body)
+
+    def mark_sent(self, now):
+        self.sent = now
+        self.attempts = self.attempts + 1
+        self.last_error = None
+
+    def mark_failed(self, error, now, backoff=60, max_attempts=8):
+        """
+        Record a failed delivery attempt. The next attempt is delayed
+        exponentially, after `max_attempts` the message is given up on.
+        """
+
+        self.attempts = self.attempts + 1
+        self.last_error = unicode(error)
+
+        if self.attempts >= max_attempts:
+            self.failed = True
+        else:
+            self.next_attempt = now + datetime.timedelta(seconds=backoff * 2 ** (self.attempts - 1))
+
+    @classmethod
+    def pending(cls):
+        return DBSession.query(cls).filter(cls.sent == None, cls.failed == False)
+
+    @classmethod
+    def due(cls, now, limit):
+        return cls.pending().filter(cls.next_attempt <= now).order_by(cls.next_attempt.asc()).limit(limit).all()
+
+    @classmethod
+    def claim(cls, now, limit, lease=600):
+        """
+        Claim up to `limit` due messages for delivery, returns the claimed
+        messages.
+
+        A message is claimed by moving its next attempt `lease` seconds into
+        the future, but only if nobody changed it since it was loaded. Another
+        dispatcher running at the same time won't see it as due, or loses the
+        race for it. Should the dispatcher die the message is retried once the
+        lease runs out.
+        """
+
+        table = cls.__table__
+        until = now + datetime.timedelta(seconds=lease)
+        claimed = []
+
+        for mail in cls.due(now, limit):
+            result = DBSession.execute(table.update().where(
+                (table.c.id == mail.id) &
+                (table.c.next_attempt == mail.next_attempt) &
+                (table.c.sent == None) &
+                (table.c.failed == False)
+                ).values(next_attempt=until))
+
+            if result.rowcount == 1:
+                claimed.append(mail)
+
+        if claimed:
+            mark_changed(DBSession())
+
+        return claimed
+
+    @classmethod
+    def stats(cls, now=None, sample=100):
+        """
+        Queue depth, age in seconds of the oldest pending message, the amount of
+        messages that failed permanently and the average latency in seconds
+        between queueing and delivery over the last `sample` messages sent.
+        """
+
+        if now is None:
+            now = datetime.datetime.utcnow()
+
+        (depth, oldest) = DBSession.query(func.count(cls.id), func.min(cls.created)).filter(cls.sent == None, cls.failed == False).one()
+        failed = DBSession.query(func.count(cls.id)).filter(cls.failed == True).scalar()
+
+        recent = DBSession.query(cls.created, cls.sent).filter(cls.sent != None).order_by(cls.sent.desc()).limit(sample).all()
+        latencies = [_seconds(sent - created) for (created, sent) in recent]
+
+        return {
+                'depth': depth,
+                'oldest': _seconds(now - oldest) if oldest is not None else None,
+                'failed': failed,
+                'latency': sum(latencies) / len(latencies) if latencies else None,
+                }
+
+def _seconds(delta):
+    return delta.days * 86400 + delta.seconds + delta.microseconds / 1e6
@@ -0,0 +1,163 @@
+# File: search.py
+# Author: Bert JW Regeer <bertjw@regeer.org>
+# Created: 2026-10-18
+
+import logging
+log = logging.getLogger(__name__)
+
+import re
+
+from meta import DBSession
+
+from sqlalchemy import text
+
+# The searchable documents: (kind, table, column with the CVE id, the SQL
+# expression for the text). For PostgreSQL the expression is used as is in
+# both the index and the queries, so that the GIN indexes are used.
+_documents = (
+        ('cve', 'cve', 'id', "coalesce(name, '') || ' ' || coalesce(oneliner, '') || ' ' || coalesce(description, '')"),
+        ('poc', 'cve_pocs', 'cve_id', "coalesce(name, '') || ' ' || coalesce(email, '')"),
+        ('ticket', 'tickets', 'cve_id', "coalesce(ticket, '')"),
+        )
+
+_word_re = re.compile(r'\w+', re.UNICODE)
+
+def _terms(query):
+    return _word_re.findall(query.lower())
+
+def _pg_create(conn):
+    for (kind, table, cve_id, document) in _documents:
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_{table}_search ON {table} USING gin (to_tsvector('simple', {document}))".format(table=table, document=document)))
+
+def _pg_search(terms, dc, limit):
+    # One query per term (as a prefix) and document, all served by the GIN
+    # indexes, _ranked() combines them per CVE
+    parts = []
+    params = {}
+
+    for (n, term) in enumerate(terms):
+        params['q{}'.format(n)] = u'{}:*'.format(term)
+
+        for (kind, table, cve_id, document) in _documents:
+            parts.append("""SELECT '{kind}' AS kind, {cve_id} AS cve_id, {n} AS term,
+                    ts_rank(to_tsvector('simple', {document}), to_tsquery('simple', :q{n})) AS rank
+                FROM {table}
+                WHERE to_tsvector('simple', {document}) @@ to_tsquery('simple', :q{n})""".format(kind=kind, table=table, cve_id=cve_id, document=document, n=n))
+
+    return _ranked(' UNION ALL '.join(parts), params, len(terms), dc, limit)
+
+_sqlite_triggers = """
+CREATE TRIGGER IF NOT EXISTS {table}_search_ai AFTER INSERT ON {table} BEGIN
+    INSERT INTO search_fts (kind, ref, cve_id, body) VALUES ('{kind}', new.id, new.{cve_id}, {new_document});
+END;
+CREATE TRIGGER IF NOT EXISTS {table}_search_ad AFTER DELETE ON {table} BEGIN
+    DELETE FROM search_fts WHERE kind = '{kind}' AND ref = old.id;
+END;
+CREATE TRIGGER IF NOT EXISTS {table}_search_au AFTER UPDATE ON {table} BEGIN
+    DELETE FROM search_fts WHERE kind = '{kind}' AND ref = old.id;
+    INSERT INTO search_fts (kind, ref, cve_id, body) VALUES ('{kind}', new.id, new.{cve_id}, {new_document});
+END;
+"""
+
+def _sqlite_create(conn):
+    exists = conn.execute(text("SELECT count(*) FROM sqlite_master WHERE name = 'search_fts'")).scalar()
+
+    if exists:
+        return
+
+    # The FTS5 table holds a copy of the text, kept up to date by triggers on
+    # the tables that are searched.
+    conn.execute(text("CREATE VIRTUAL TABLE search_fts USING fts5 (kind UNINDEXED, ref UNINDEXED, cve_id UNINDEXED, body, prefix='2 3')"))
+
+    for (kind, table, cve_id, document) in _documents:
+        new_document = re.sub(r'coalesce\((\w+),', r'coalesce(new.\1,', document)
+
+        for statement in _sqlite_triggers.format(kind=kind, table=table, cve_id=cve_id, new_document=new_document).split('END;'):
+            if statement.strip():
+                conn.execute(text(statement + 'END;'))
+
+        conn.execute(text("INSERT INTO search_fts (kind, ref, cve_id, body) SELECT '{kind}', id, {cve_id}, {document} FROM {table}".format(kind=kind, table=table, cve_id=cve_id, document=document)))
+
+def _sqlite_search(terms, dc, limit):
+    # One query per term, quoted (so it is never taken as FTS5 syntax) and as
+    # a prefix, _ranked() combines them per CVE
+    parts = []
+    params = {}
+
+    for (n, term) in enumerate(terms):
+        params['q{}'.format(n)] = u'"{}"*'.format(term)
+        parts.append("SELECT kind, cve_id, {n} AS term, -bm25(search_fts) AS rank FROM search_fts WHERE search_fts MATCH :q{n}".format(n=n))
+
+    return _ranked(' UNION ALL '.join(parts), params, len(terms), dc, limit)
+
+def _ranked(inner, params, terms, dc, limit):
+    """
+    Combine the matching documents (kind, cve_id, term, rank) from `inner`
+    per CVE. A CVE is found if every term matched one of its documents, the
+    terms don't have to match the same document.
+    """
+
+    sql = """SELECT r.cve_id, sum(r.rank) AS rank,
+            max(CASE WHEN r.kind = 'cve' THEN 1 ELSE 0 END) AS cve,
+            max(CASE WHEN r.kind = 'poc' THEN 1 ELSE 0 END) AS poc,
+            max(CASE WHEN r.kind = 'ticket' THEN 1 ELSE 0 END) AS ticket
+        FROM ({inner}) AS r JOIN cve ON cve.id = r.cve_id""".format(inner=inner)
+
+    if dc is not None:
+        sql += " WHERE cve.dc = :dc"
+        params['dc'] = dc
+
+    sql += " GROUP BY r.cve_id HAVING count(DISTINCT r.term) = :terms ORDER BY rank DESC LIMIT :limit"
+    params['terms'] = terms
+    params['limit'] = limit
+
+    return DBSession.execute(text(sql), params).fetchall()
+
+_backends = {
+        'postgresql': (_pg_create, _pg_search),
+        'sqlite': (_sqlite_create, _sqlite_search),
+        }
+
+def create_search_index(engine):
+    """
+    Create the full text search indexes for the database, if they don't
+    exist yet. PostgreSQL uses GIN indexes on the tables themselves, SQLite
+    an FTS5 table that is filled from the existing rows when it is created.
+    """
+
+    backend = _backends.get(engine.dialect.name)
+
+    if backend is None:
+        log.warn('Full text search is not supported on {}'.format(engine.dialect.name))
+        return
+
+    with engine.begin() as conn:
+        backend[0](conn)
+
+def search_cves(query, dc=None, limit=50):
+    """
+    Search the CVE's, their POCs and tickets for `query`. Every word has to
+    match, each as a prefix, but they may match different documents of the
+    same CVE (for example its name and the email address of a POC).
+
+    Returns a list of (cve_id, rank, kinds) ordered by rank, where `kinds`
+    are the documents that matched ('cve', 'poc' or 'ticket').
+    """
+
+    terms = _terms(query)
+
+    if not terms:
+        return []
+
+    backend = _backends.get(DBSession.get_bind().dialect.name)
+
+    if backend is None:
+        return []
+
+    results = []
+
+    for (cve_id, rank, cve, poc, ticket) in backend[1](terms, dc, limit):
+        kinds = set(kind for (kind, matched) in (('cve', cve), ('poc', poc), ('ticket', ticket)) if matched)
+        results.append((cve_id, rank, kinds))
+
+    return results
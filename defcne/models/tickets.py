@@ -11,6 +11,7 @@ from sqlalchemy import (
         Column,
         DateTime,
         ForeignKey,
+        Index,
         Integer,
         Table,
         Unicode,
@@ -19,6 +20,7 @@ from sqlalchemy import (
         )
 
 from sqlalchemy.orm import (
+        joinedload,
         relationship,
         )
 
@@ -29,14 +31,65 @@ class Ticket(Base):
             Column('user_id', Integer, ForeignKey('users.id', onupdate='CASCADE', ondelete='CASCADE')),
             Column('ticket', Unicode),
             Column('created', DateTime, server_default=text('current_timestamp')),
+
+            Index('ix_tickets_cve_id_created', 'cve_id', 'created'),
             )
     
     user = relationship("User")
 
     @classmethod
     def count_tickets(cls, cve_id):
-        return DBSession.query(func.count(cls.id)).filter(cls.cve_id == cve_id).all()
+        return DBSession.query(func.count(cls.id)).filter(cls.cve_id == cve_id).scalar()
+
+    @classmethod
+    def count_by_cve(cls, cve_ids):
+        """
+        Returns a dictionary of cve_id to the amount of tickets for each of
+        `cve_ids`, using a single grouped query.
+        """
+
+        if not cve_ids:
+            return {}
+
+        counts = dict((cve_id, 0) for cve_id in cve_ids)
+        counts.update(DBSession.query(cls.cve_id, func.count(cls.id)).filter(cls.cve_id.in_(cve_ids)).group_by(cls.cve_id))
+
+        return counts
 
     @classmethod
-    def find_tickets(cls, cve_id):
-        return DBSession.query(cls).filter(cls.cve_id == cve_id).order_by(cls.created.asc()).all()
+    def find_tickets(cls, cve_id, page=None, per_page=25):
+        """
+        Returns the tickets for a CVE, oldest first, with their authors loaded
+        in the same query.
+
+        If `page` is given (starting at 0) only `per_page` tickets are returned
+        for that page.
+        """
+
+        q = DBSession.query(cls).filter(cls.cve_id == cve_id).options(joinedload('user')).order_by(cls.created.asc(), cls.id.asc())
+
+        if page is not None:
+            q = q.offset(page * per_page).limit(per_page)
+
+        return q.all()
+
+    @classmethod
+    def paginate(cls, cve_id, page=None, per_page=25):
+        """
+        Returns a page of tickets for a CVE along with the information needed
+        to link to the other pages. If `page` is None or out of range the last
+        page (with the newest tickets) is returned.
+        """
+
+        count = cls.count_tickets(cve_id)
+        pages = max(1, (count + per_page - 1) // per_page)
+
+        if page is None or page < 0 or page >= pages:
+            page = pages - 1
+
+        return {
+                'tickets': cls.find_tickets(cve_id, page=page, per_page=per_page) if count else [],
+                'count': count,
+                'page': page,
+                'pages': pages,
+                }
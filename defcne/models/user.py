@@ -20,17 +20,19 @@ from sqlalchemy import (
         Table,
         Unicode,
         and_,
+        or_,
         )
 
 from sqlalchemy.orm import (
         contains_eager,
         noload,
         relationship,
+        subqueryload,
         )
 
 from sqlalchemy.ext.hybrid import hybrid_property
 
-from cryptacular.bcrypt import BCRYPTPasswordManager
+from .. import passwords
 
 class User(Base):
     __table__ = Table('users', Base.metadata,
@@ -76,8 +78,7 @@ class User(Base):
 
     @credentials.setter
     def credentials(self, value):
-        manager = BCRYPTPasswordManager()
-        self._credentials = manager.encode(value, rounds=12)
+        self._credentials = passwords.encode(value)
 
     @classmethod
     def find_user(cls, username):
@@ -91,6 +92,47 @@ class User(Base):
     def find_user_by_email(cls, email):
         return DBSession.query(cls).filter(cls.email == email.lower()).first()
 
+    @classmethod
+    def find_users(cls, after=None, limit=50, group=None, validated=None, search=None):
+        """
+        Returns a page of users ordered by username, and the username to pass
+        as `after` to get the next page (None if this is the last page).
+
+        Pages are found by seeking past `after` on the username index rather
+        than using an offset. The users may be filtered by group name,
+        validated state and a substring of the username, real name or email.
+        """
+
+        q = DBSession.query(cls).options(subqueryload(cls.groups))
+
+        if after is not None:
+            q = q.filter(cls.username > after.lower())
+
+        if group is not None:
+            q = q.filter(cls.groups.any(name=group))
+
+        if validated is not None:
+            q = q.filter(cls.validated == validated)
+
+        if search:
+            # Escape the LIKE wildcards so they are matched literally
+            search = search.lower().replace(u'\\', u'\\\\').replace(u'%', u'\\%').replace(u'_', u'\\_')
+            pattern = u'%' + search + u'%'
+
+            q = q.filter(or_(
+                cls.username.like(pattern, escape=u'\\'),
+                cls.realname.ilike(pattern, escape=u'\\'),
+                cls.email.like(pattern, escape=u'\\'),
+                ))
+
+        users = q.order_by(cls.username.asc()).limit(limit + 1).all()
+
+        if len(users) > limit:
+            users = users[:limit]
+            return (users, users[-1].username)
+
+        return (users, None)
+
     @classmethod
     def validate_user_password(cls, username, password):
         user = DBSession.query(cls).options(noload(cls.groups)).filter(cls.username == username.lower()).first()
@@ -98,8 +140,11 @@ class User(Base):
         if user is None:
             return None
 
-        manager = BCRYPTPasswordManager()
-        if manager.check(user.credentials, password):
+        if passwords.check(user.credentials, password):
+            # Upgrade the hash if the configured cost has changed
+            if passwords.needs_rehash(user.credentials):
+                user.credentials = password
+
             return user
 
         return None
@@ -164,11 +209,53 @@ class UserTickets(Base):
 
             PrimaryKeyConstraint('ticket', 'user_id'),
             Index('ix_ticket_userid', 'ticket', 'user_id'),
+            Index('ix_user_tickets_userid_created', 'user_id', 'created'),
+            Index('ix_user_tickets_created', 'created'),
             )
 
     user = relationship("User", lazy="joined")
 
+    # Tickets are valid for as long as the authentication cookie
+    max_age = 864000
+
+    @classmethod
+    def find_ticket_username(cls, ticket, username, max_age=None):
+        if max_age is None:
+            max_age = cls.max_age
+
+        cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=max_age)
+        return DBSession.query(cls).join(User, and_(User.username == username.lower(), User.id == cls.user_id)).filter(cls.ticket == ticket, cls.created >= cutoff).options(contains_eager('user')).first()
+
+    @classmethod
+    def trim_user(cls, user_id, keep):
+        """
+        Remove all but the `keep` newest tickets for a user, returns the
+        tickets that were removed.
+        """
+
+        old = DBSession.query(cls.ticket).filter(cls.user_id == user_id).order_by(cls.created.desc()).offset(keep).all()
+        tickets = [ticket for (ticket,) in old]
+
+        if len(tickets):
+            DBSession.query(cls).filter(cls.user_id == user_id, cls.ticket.in_(tickets)).delete(synchronize_session=False)
+
+        return tickets
+
     @classmethod
-    def find_ticket_username(cls, ticket, username):
-        return DBSession.query(cls).join(User, and_(User.username == username.lower(), User.id == cls.user_id)).filter(cls.ticket == ticket).options(contains_eager('user')).first()
+    def purge_expired(cls, max_age=None, limit=1000):
+        """
+        Remove up to `limit` tickets older than `max_age` seconds, returns the
+        amount of tickets removed. Call repeatedly (committing in between) until
+        it returns 0 to remove all expired tickets.
+        """
+
+        if max_age is None:
+            max_age = cls.max_age
+
+        cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=max_age)
+        expired = DBSession.query(cls.ticket).filter(cls.created < cutoff).limit(limit).all()
+
+        if len(expired) == 0:
+            return 0
 
+        return DBSession.query(cls).filter(cls.created < cutoff, cls.ticket.in_([ticket for (ticket,) in expired])).delete(synchronize_session=False)
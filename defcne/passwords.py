@@ -0,0 +1,104 @@
+# File: passwords.py
+# Author: Bert JW Regeer <bertjw@regeer.org>
+# Created: 2026-10-18
+
+import logging
+log = logging.getLogger(__name__)
+
+import multiprocessing
+import re
+import threading
+
+from cryptacular.bcrypt import BCRYPTPasswordManager
+
+class PasswordHasherBusy(Exception):
+    """
+    Raised when too many password hashes/checks are already waiting, instead of
+    queueing up even more requests behind them.
+    """
+
+def _encode(password, rounds):
+    return BCRYPTPasswordManager().encode(password, rounds=rounds)
+
+def _check(encoded, password):
+    return BCRYPTPasswordManager().check(encoded, password)
+
+_rounds_re = re.compile(r'^\$2[a-z]?\$(\d+)\$')
+
+class PasswordHasher(object):
+    """
+    Hashes and checks bcrypt passwords
+
+    If `workers` is larger than 0 the work is done in a pool of that many
+    processes, which limits the CPU used by bcrypt to those processes and
+    keeps it out of the process serving requests (the GIL). The calling
+    waitress thread still waits for the result. At most `max_pending`
+    hashes/checks may be in progress or waiting at any time, after that
+    PasswordHasherBusy is raised straight away instead of tying up even more
+    threads.
+    """
+
+    def __init__(self, rounds=12, workers=0, max_pending=None):
+        self.rounds = rounds
+        self._pool = multiprocessing.Pool(workers) if workers > 0 else None
+        self._slots = threading.BoundedSemaphore(max_pending) if max_pending else None
+
+    def _run(self, func, *args):
+        if self._slots is not None and not self._slots.acquire(False):
+            log.warn('Password hashing queue is full, refusing request.')
+            raise PasswordHasherBusy()
+
+        try:
+            if self._pool is None:
+                return func(*args)
+
+            return self._pool.apply(func, args)
+        finally:
+            if self._slots is not None:
+                self._slots.release()
+
+    def encode(self, password):
+        return self._run(_encode, password, self.rounds)
+
+    def check(self, encoded, password):
+        return self._run(_check, encoded, password)
+
+    def needs_rehash(self, encoded):
+        """
+        Returns True if `encoded` was hashed with a different cost than the
+        currently configured amount of rounds.
+        """
+
+        match = _rounds_re.match(encoded)
+        return match is None or int(match.group(1)) != self.rounds
+
+# Used by the scripts, until configure() is called hashing is done inline
+_hasher = PasswordHasher()
+
+def configure(settings):
+    """
+    Configure the password hasher from the settings:
+
+    defcne.bcrypt.rounds: bcrypt cost (default 12)
+    defcne.bcrypt.workers: size of the process pool, 0 hashes in the request
+                           thread (default 0)
+    defcne.bcrypt.max_pending: hashes/checks allowed to be in progress or
+                               waiting (default 4 per worker)
+    """
+
+    global _hasher
+
+    rounds = int(settings.get('defcne.bcrypt.rounds', 12))
+    workers = int(settings.get('defcne.bcrypt.workers', 0))
+    max_pending = int(settings.get('defcne.bcrypt.max_pending', 4 * max(workers, 1)))
+
+    _hasher = PasswordHasher(rounds=rounds, workers=workers, max_pending=max_pending)
+
+def encode(password):
+    return _hasher.encode(password)
+
+def check(encoded, password):
+    return _hasher.check(encoded, password)
+
+def needs_rehash(encoded):
+    return _hasher.needs_rehash(encoded)
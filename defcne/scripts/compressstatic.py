@@ -0,0 +1,52 @@
+import os
+import sys
+import gzip
+import shutil
+
+from pyramid.path import AssetResolver
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Only text assets benefit from being compressed
+_compress = ('.css', '.js', '.svg', '.html', '.txt')
+
+def usage(argv):
+    cmd = os.path.basename(argv[0])
+    print('usage: %s\n'
+          'Creates precompressed (gzip, and brotli if available) copies of the\n'
+          'static assets, served if defcne.static.content_encodings is set.' % (cmd,))
+    sys.exit(1)
+
+def compress(filename):
+    with open(filename, 'rb') as src:
+        with open(filename + '.gz', 'wb') as dst:
+            gz = gzip.GzipFile(filename='', mode='wb', fileobj=dst, compresslevel=9, mtime=0)
+            shutil.copyfileobj(src, gz)
+            gz.close()
+
+    if brotli is not None:
+        with open(filename, 'rb') as src:
+            data = brotli.compress(src.read())
+
+        with open(filename + '.br', 'wb') as dst:
+            dst.write(data)
+
+def main(argv=sys.argv):
+    if len(argv) != 1:
+        usage(argv)
+
+    root = AssetResolver().resolve('defcne:static/').abspath()
+    count = 0
+
+    for (dirpath, dirnames, filenames) in os.walk(root):
+        for filename in filenames:
+            if os.path.splitext(filename)[1] not in _compress:
+                continue
+
+            compress(os.path.join(dirpath, filename))
+            count = count + 1
+
+    print('Compressed {} static assets.'.format(count))
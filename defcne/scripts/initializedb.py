@@ -3,7 +3,10 @@ import sys
 import transaction
 import datetime
 
-from sqlalchemy import engine_from_config
+from sqlalchemy import (
+    engine_from_config,
+    inspect,
+    )
 from sqlalchemy.exc import IntegrityError
 
 from pyramid.paster import (
@@ -43,6 +46,22 @@ defaults = {
             ]
         }
 
+def create_missing_indexes(engine):
+    """
+    create_all() does not add new indexes to tables that already exist, so we
+    create any that are missing from an existing database.
+    """
+
+    inspector = inspect(engine)
+
+    for table in Base.metadata.sorted_tables:
+        existing = set([idx['name'] for idx in inspector.get_indexes(table.name)])
+
+        for index in table.indexes:
+            if index.name not in existing:
+                print 'Creating index "{name}" on "{table}".'.format(name=index.name, table=table.name)
+                index.create(engine)
+
 def main(argv=sys.argv):
     if len(argv) != 2:
         usage(argv)
@@ -52,6 +71,8 @@ def main(argv=sys.argv):
     engine = engine_from_config(settings, 'sqlalchemy.')
     DBSession.configure(bind=engine)
     Base.metadata.create_all(engine)
+    create_missing_indexes(engine)
+    create_search_index(engine)
 
     with transaction.manager:
         for (kw, items) in defaults.items():
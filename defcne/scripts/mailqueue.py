@@ -0,0 +1,141 @@
+import os
+import sys
+import time
+import datetime
+import logging
+import smtplib
+import transaction
+
+from sqlalchemy import engine_from_config
+
+from pyramid.paster import (
+    get_appsettings,
+    setup_logging,
+    )
+from pyramid.settings import asbool
+
+from ..models import *
+
+log = logging.getLogger(__name__)
+
+def usage(argv):
+    cmd = os.path.basename(argv[0])
+    print('usage: %s <config_uri> [--once]\n'
+          '(example: "%s development.ini")' % (cmd, cmd))
+    sys.exit(1)
+
+def smtp_connect(settings):
+    """
+    Open a single SMTP connection using the pyramid_mailer settings
+    """
+
+    host = settings.get('mail.host', 'localhost')
+    port = int(settings.get('mail.port', 25))
+
+    if asbool(settings.get('mail.ssl', False)):
+        conn = smtplib.SMTP_SSL(host, port)
+    else:
+        conn = smtplib.SMTP(host, port)
+
+    if asbool(settings.get('mail.tls', False)):
+        conn.starttls()
+
+    if settings.get('mail.username'):
+        conn.login(settings['mail.username'], settings.get('mail.password', ''))
+
+    return conn
+
+def send_batch(settings):
+    """
+    Deliver one batch of messages from the outbox over a single connection
+
+    The messages are claimed (see MailOutbox.claim), and the transaction is
+    committed before talking to the SMTP server, so that a slow server does not
+    hold the database transaction open. Multiple dispatchers may run at the
+    same time, each message is only sent by the one that claimed it, as long
+    as a batch is sent within the lease. Returns the amount of messages that
+    were claimed.
+    """
+
+    batch_size = int(settings.get('defcne.mail_queue.batch_size', 50))
+    backoff = int(settings.get('defcne.mail_queue.backoff', 60))
+    max_attempts = int(settings.get('defcne.mail_queue.max_attempts', 8))
+    lease = int(settings.get('defcne.mail_queue.lease', 600))
+
+    with transaction.manager:
+        claimed = MailOutbox.claim(datetime.datetime.utcnow(), batch_size, lease)
+        batch = [(mail.id, mail.sender, mail.recipients.split(u'\n'), mail.message().to_message().as_string()) for mail in claimed]
+
+    if len(batch) == 0:
+        return 0
+
+    results = {}
+
+    try:
+        conn = smtp_connect(settings)
+    except (smtplib.SMTPException, IOError), e:
+        log.error('Unable to connect to SMTP server: {}'.format(e))
+        results = dict((mid, e) for (mid, _, _, _) in batch)
+        conn = None
+
+    if conn is not None:
+        try:
+            for (mid, sender, recipients, message) in batch:
+                try:
+                    conn.sendmail(sender, recipients, message)
+                    results[mid] = None
+                except smtplib.SMTPServerDisconnected, e:
+                    results[mid] = e
+                    break
+                except smtplib.SMTPException, e:
+                    results[mid] = e
+        finally:
+            try:
+                conn.quit()
+            except (smtplib.SMTPException, IOError):
+                pass
+
+    with transaction.manager:
+        now = datetime.datetime.utcnow()
+
+        for (mid, _, _, _) in batch:
+            mail = DBSession.query(MailOutbox).get(mid)
+
+            if mid not in results:
+                # Never attempted, the connection went away. Release the
+                # claim so it is picked up by the next batch.
+                mail.next_attempt = now
+            elif results[mid] is None:
+                mail.mark_sent(now)
+            else:
+                log.warn('Failed to deliver mail {}: {}'.format(mid, results[mid]))
+                mail.mark_failed(results[mid], now, backoff=backoff, max_attempts=max_attempts)
+
+        stats = MailOutbox.stats(now)
+
+    sent = len([r for r in results.values() if r is None])
+    log.info('Sent {} of {} messages. Queue depth: {}, oldest pending: {}s, failed: {}, average latency: {}s'.format(
+        sent, len(batch), stats['depth'], stats['oldest'], stats['failed'], stats['latency']))
+
+    return len(batch)
+
+def main(argv=sys.argv):
+    if len(argv) not in (2, 3) or (len(argv) == 3 and argv[2] != '--once'):
+        usage(argv)
+    config_uri = argv[1]
+    setup_logging(config_uri)
+    settings = get_appsettings(config_uri)
+    engine = engine_from_config(settings, 'sqlalchemy.')
+    DBSession.configure(bind=engine)
+
+    interval = int(settings.get('defcne.mail_queue.interval', 10))
+
+    while True:
+        # Keep going while there are full batches waiting
+        while send_batch(settings):
+            pass
+
+        if len(argv) == 3:
+            break
+
+        time.sleep(interval)
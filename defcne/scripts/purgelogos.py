@@ -0,0 +1,50 @@
+import os
+import sys
+import logging
+import transaction
+
+from sqlalchemy import engine_from_config
+
+from pyramid.paster import (
+    get_appsettings,
+    setup_logging,
+    )
+
+from ..models import *
+from ..logos import LogoStore
+
+log = logging.getLogger(__name__)
+
+def usage(argv):
+    cmd = os.path.basename(argv[0])
+    print('usage: %s <config_uri> [--dry-run]\n'
+          '(example: "%s development.ini")' % (cmd, cmd))
+    sys.exit(1)
+
+def main(argv=sys.argv):
+    if len(argv) not in (2, 3) or (len(argv) == 3 and argv[2] != '--dry-run'):
+        usage(argv)
+    config_uri = argv[1]
+    setup_logging(config_uri)
+    settings = get_appsettings(config_uri)
+    engine = engine_from_config(settings, 'sqlalchemy.')
+    DBSession.configure(bind=engine)
+
+    store = LogoStore(settings['defcne.upload_path'])
+    grace = int(settings.get('defcne.logos.grace', 3600))
+
+    with transaction.manager:
+        referenced = CVEBase.logos_in_use()
+
+    # Logos uploaded after we got the references are newer than the grace
+    # period, and are left alone
+    orphans = store.orphans(referenced, grace)
+
+    for logo in orphans:
+        if len(argv) == 3:
+            print(logo)
+        else:
+            log.debug('Removing orphaned logo {}'.format(logo))
+            store.delete(logo)
+
+    print('{} {} orphaned logos.'.format('Found' if len(argv) == 3 else 'Removed', len(orphans)))
@@ -0,0 +1,49 @@
+import os
+import sys
+import logging
+import transaction
+
+from sqlalchemy import engine_from_config
+
+from pyramid.paster import (
+    get_appsettings,
+    setup_logging,
+    )
+
+from ..models import *
+
+log = logging.getLogger(__name__)
+
+def usage(argv):
+    cmd = os.path.basename(argv[0])
+    print('usage: %s <config_uri>\n'
+          '(example: "%s development.ini")' % (cmd, cmd))
+    sys.exit(1)
+
+def main(argv=sys.argv):
+    if len(argv) != 2:
+        usage(argv)
+    config_uri = argv[1]
+    setup_logging(config_uri)
+    settings = get_appsettings(config_uri)
+    engine = engine_from_config(settings, 'sqlalchemy.')
+    DBSession.configure(bind=engine)
+
+    max_age = int(settings.get('defcne.tickets.max_age', UserTickets.max_age))
+    batch_size = int(settings.get('defcne.tickets.purge_batch', 1000))
+
+    total = 0
+
+    # Each batch is its own transaction, so that we don't hold locks on the
+    # tickets table for longer than we have to
+    while True:
+        with transaction.manager:
+            removed = UserTickets.purge_expired(max_age, batch_size)
+
+        if removed == 0:
+            break
+
+        total = total + removed
+        log.debug('Removed {} expired tickets'.format(removed))
+
+    print('Removed {} expired tickets.'.format(total))
@@ -0,0 +1,40 @@
+// Check whether the name typed in a CVE form is still available, so the user
+// finds out before submitting the whole form (and uploading their logo).
+(function ($) {
+    var script = $('#name-available');
+    var url = script.data('url');
+    var current = String(script.data('current') || '').toLowerCase();
+    var input = $('input[name="name"]');
+    var help = $('<span class="help-inline"></span>').insertAfter(input);
+    var timer = null;
+    var pending = null;
+
+    function check() {
+        var name = $.trim(input.val());
+
+        if (pending !== null) {
+            pending.abort();
+            pending = null;
+        }
+
+        if (name === '' || name.toLowerCase() === current) {
+            help.text('');
+            return;
+        }
+
+        pending = $.getJSON(url, {name: name}, function (data) {
+            pending = null;
+
+            if ($.trim(input.val()) !== data.name) {
+                return;
+            }
+
+            help.text(data.available ? 'Available' : 'Name already exists, please choose a different name.');
+        });
+    }
+
+    input.on('input keyup', function () {
+        clearTimeout(timer);
+        timer = setTimeout(check, 300);
+    });
+})(jQuery);
@@ -1,9 +1,20 @@
 # Package
 
-from pyramid_mailer import get_mailer
+import logging
+log = logging.getLogger(__name__)
+
 from pyramid_mailer.message import Message
 
 from .. import models as m
+from ..cache import delete_after_commit
+from ..cvetypes import (
+        cve_types,
+        name_cache_key,
+        )
+from ..listing import (
+        invalidate_listing,
+        listing_changed,
+        )
 
 __user_created__ = """DEFCnE Account Validation
 
@@ -25,7 +36,7 @@ def user_created(event):
 
     text = __user_created__.format(validate_url=event.kw['validate_url'], validate_url_nodata=event.request.route_url('defcne.user', traverse=('validate')), username=event.user.disp_uname, token=event.kw['token'])
     message = Message(subject="DEFCnE User Account Validation", sender="defcne@defcne.net", recipients=[event.user.email], body=text)
-    get_mailer(event.request).send(message)
+    m.MailOutbox.enqueue(message)
 
 
 __user_forgotpassword__ = """DEFCnE Reset Account
@@ -50,7 +61,7 @@ def user_forgotpassword(event):
 
     text = __user_forgotpassword__.format(reset_url=event.kw['reset_url'], reset_url_nodata=event.request.route_url('defcne.user', traverse=('reset')), username=event.user.disp_uname, token=event.kw['token'])
     message = Message(subject="DEFCnE Reset Account", sender="defcne@defcne.net", recipients=[event.user.email], body=text)
-    get_mailer(event.request).send(message)
+    m.MailOutbox.enqueue(message)
 
 
 __user_passwordupdated__ = """DEFCnE Password Updated
@@ -69,7 +80,7 @@ def user_passwordupdated(event):
 
     text = __user_passwordupdated__
     message = Message(subject="DEFCnE Password Updated", sender="defcne@defcne.net", recipients=[event.user.email], body=text)
-    get_mailer(event.request).send(message)
+    m.MailOutbox.enqueue(message)
 
 __staff_eventcreated__ = """DEFCnE Contest/Event Created
 
@@ -86,14 +97,51 @@ DEFCnE's Little Helper Bot
 """
 
 def cne_created(event):
-    manage_url = event.request.route_url('defcne.e', traverse=(event.cne.dc, event.cne.id, 'manage'))
+    manage_url = event.request.route_url(cve_types[event.cne.type].route, traverse=(event.cne.dc, event.cne.id, 'manage'))
     text = __staff_eventcreated__.format(contest_name=event.cne.disp_name, contest_owner=event.request.user.user.disp_uname, event_manage_url=manage_url)
 
-    staff_list = m.Group.find_group(u'staff').users
-    staff_emails = [user.email for user in staff_list]
+    staff_emails = m.Group.find_emails(u'staff')
+
+    # Nobody to notify, the outbox refuses messages without recipients
+    if not staff_emails:
+        log.warn('No staff to notify of the creation of "{}"'.format(event.cne.disp_name))
+        return
 
     message = Message(subject="DEFCnE Contest/Event Created", sender="defcne@defcne.net", recipients=staff_emails, body=text)
-    get_mailer(event.request).send(message)
+    m.MailOutbox.enqueue(message)
+
+def cne_history(event):
+    # Keep a record of what was changed, and by whom
+    changes = event.kw.get('changes')
+
+    if not changes:
+        return
+
+    m.CVEHistory.record(event.cne.id, event.request.user.userid, changes)
+
+def cne_invalidate_listing(event):
+    # The published listing for this type/DEF CON may have changed, updates
+    # only if they changed something that is part of the listing
+    changes = event.kw.get('changes')
+
+    if changes is not None and not listing_changed(event.cne, changes):
+        return
+
+    invalidate_listing(event.request, event.cne.dc, event.cne.type)
+
+    if changes is not None and 'dc' in changes:
+        invalidate_listing(event.request, changes['dc'][0], event.cne.type)
+
+def cnes_status_changed(event):
+    # One invalidation for the whole batch, all of the CVE's share the
+    # DEF CON and type of the context
+    invalidate_listing(event.request, event.context.dc, event.context.type.name)
+
+def cne_name_taken(event):
+    # The name may have been cached as being available
+    changes = event.kw.get('changes')
+
+    if changes is not None and 'name' not in changes and 'dc' not in changes:
+        return
 
-def cne_updated(event):
-    pass
+    delete_after_commit(event.request.registry.name_cache, name_cache_key(event.cne.dc, event.cne.type, event.cne.name))
@@ -0,0 +1,11 @@
+<%inherit file="site.mako" />
+
+<div class="jumbotron">
+    <h1>Uh oh ... 503</h1>
+    <h3>We are a little busy</h3>
+    <p class="lead">
+        We are currently handling a lot of logins. Please wait a few seconds and try again.
+    </p>
+</div>
+
+<%block name="title">${parent.title()} - Uh oh ... we are a little busy!</%block>
@@ -1,6 +1,6 @@
 <%inherit file="../site.mako" />
 
-% if len(events) is 0:
+% if count == 0:
 <div class="jumbotron">
     <h1>${page_title if page_title else ''}</h1>
     <h2>Sadly, there are no ${type} yet!</h2>
@@ -16,13 +16,7 @@
             <p>DEF CON ${request.context.dc} has a lot of exciting ${type} that are going to make your DEF CON experience even better.</p>
             <p>Take a look at what is going to be on offer this year, and find something that excites you!</p>
 
-            % for event in events:
-            <div class="event">
-                <div class="name"><a href="${event['url']}">${event['name']}</a></div>
-                <div class="description">${event['description']}</div>
-                <div class="extrastuff"><ul><li><a href="${event['website']}">${event['website']}</a></li><li><a href="${event['url']}">More</a></li></ul></div>
-            </div>
-            % endfor
+            ${listing|n}
         </div>
     </div>
 </div>
@@ -14,4 +14,9 @@
 
 <%block name="title">${parent.title()} ${' - ' + page_title if page_title else ''}</%block>
 
-
+<%block name="javascript_end">
+    ${parent.javascript_end()}
+    % if context.get('name_url'):
+    <script type="text/javascript" id="name-available" data-url="${name_url}" data-current="${context.get('origname') or ''}" src="${request.static_url('defcne:static/name_available.js')}"></script>
+    % endif
+</%block>
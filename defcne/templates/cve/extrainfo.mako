@@ -5,10 +5,20 @@
         <%include file="sidebar.mako" />
         <div id="Content" class="span9">
             <h3>${page_title if page_title else ''}</h3>
-            % if len(cve['tickets']) == 0:
+            % if len(cve['tickets']['tickets']) == 0:
             <p>No additional information for this contest/cve. Feel free to send us a request below!</p>
             % else:
-            % for ticket in cve['tickets']:
+            % if cve['tickets']['prev_url'] or cve['tickets']['next_url']:
+            <ul class="pager">
+                % if cve['tickets']['prev_url']:
+                <li><a href="${cve['tickets']['prev_url']}">Older</a></li>
+                % endif
+                % if cve['tickets']['next_url']:
+                <li><a href="${cve['tickets']['next_url']}">Newer</a></li>
+                % endif
+            </ul>
+            % endif
+            % for ticket in cve['tickets']['tickets']:
             <div class="extrainfo"><p style="white-space: pre-wrap">${ticket.ticket}</p><div class="userdate" style="text-align: right;">${ticket.user.disp_uname}<br />${ticket.created.isoformat()}</div></div>
             % endfor
             <p>Feel free to respond or add more information using the form below.</p>
@@ -0,0 +1,7 @@
+% for event in events:
+<div class="event">
+    <div class="name"><a href="${event['url']}">${event['name']}</a></div>
+    <div class="description">${event['description']}</div>
+    <div class="extrastuff"><ul><li><a href="${event['website']}">${event['website']}</a></li><li><a href="${event['url']}">More</a></li></ul></div>
+</div>
+% endfor
@@ -11,7 +11,7 @@
             <p style="white-space: pre-wrap">${cve['description']}</p>
             % if len(cve['logo']) != 0:
             <p><b>logo</b>:</p>
-            <p><img src="${request.static_url(cve['logo'])}" style="max-height: 200px; max-width: 200px;"></p>
+            <p><img src="${cve['logo']}" style="max-height: 200px; max-width: 200px;"></p>
             % endif
             <ul>
                 % for (it, ft, type) in listitems:
@@ -61,6 +61,6 @@
 </div>
 
 <%block name="title">${parent.title()} ${' - ' + page_title if page_title else ''}</%block>
-<%block name="flash"><%include file="../flash.mako" args="queue_name='event', alert_type='success'" /></%block>
+<%block name="flash"><%include file="../flash.mako" args="queue_name='cve', alert_type='success'" /></%block>
 
 
@@ -5,7 +5,7 @@
         <%include file="sidebar.mako" />
         <div id="Content" class="span9">
             <h3>${page_title if page_title else ''}</h3>
-            % if events:
+            % if cves:
                 <h4>Totals:</h4>
                 <p>
                     <ul>
@@ -17,6 +17,7 @@
             <table class="table table-striped table-condensed table-bordered">
                 <thead>
                     <tr>
+                        <th>Type</th>
                         <th>Name</th>
                         <th>Status</th>
                         <th>Black Badge</th>
@@ -25,12 +26,13 @@
                     </tr>
                 </thead>
                 <tbody>
-                    % for event in events:
+                    % for cve in cves:
                     <tr>
-                        <td><a href="${event['magic_url']}">${event['name']}</a></td>
-                        <td>${event['status']}</td>
+                        <td>${cve['type']}</td>
+                        <td><a href="${cve['magic_url']}">${cve['name']}</a></td>
+                        <td>${cve['status']}</td>
                         <td>
-                            % if event['blackbadge']:
+                            % if cve['blackbadge']:
                             <i class="icon-ok"></i>
                             % else:
                             <i class="icon-remove"></i>
@@ -38,18 +40,21 @@
                         </td>
                         <td>
                             <ul>
-                            % for badge in event['badges']:
+                            % for badge in cve['badges']:
                                 <li><b>${badge['typeof']}:</b> ${badge['amount']}</li>
                             % endfor
                             </ul>
+                        </td>
                         <td>
-                            <a href="${event['edit_url']}" class="btn btn-small btn-primary">Edit</a>
-                            <a href="${event['manage_url']}" class="btn btn-small btn-danger">Manage Event</a>
+                            <a href="${cve['edit_url']}" class="btn btn-small btn-primary">Edit</a>
+                            <a href="${cve['manage_url']}" class="btn btn-small btn-danger">Manage</a>
                         </td>
                     </tr>
                     % endfor
                 </tbody>
             </table>
+            % else:
+                Nothing found.
             %endif
         </div>
     </div>
@@ -9,7 +9,7 @@
             <p style="white-space: pre-wrap">${cve['description']}</p>
             % if len(cve['logo']) != 0:
             <p><b>logo</b>:</p> 
-            <p><img src="${request.static_url(cve['logo'])}" style="max-height: 200px; max-width: 200px;"></p>
+            <p><img src="${cve['logo']}" style="max-height: 200px; max-width: 200px;"></p>
             % endif
             <ul>
                 % for (it, ft, type) in listitems:
@@ -61,10 +61,20 @@
 
             <hr>
 
-            % if len(cve['tickets']) == 0:
+            % if len(cve['tickets']['tickets']) == 0:
             <p>No additional information. Send request to contest owner below.</p>
             % else:
-            % for ticket in cve['tickets']:
+            % if cve['tickets']['prev_url'] or cve['tickets']['next_url']:
+            <ul class="pager">
+                % if cve['tickets']['prev_url']:
+                <li><a href="${cve['tickets']['prev_url']}">Older</a></li>
+                % endif
+                % if cve['tickets']['next_url']:
+                <li><a href="${cve['tickets']['next_url']}">Newer</a></li>
+                % endif
+            </ul>
+            % endif
+            % for ticket in cve['tickets']['tickets']:
             <div class="extrainfo"><p style="white-space: pre-wrap">${ticket.ticket}</p><div class="userdate" style="text-align: right;">${ticket.user.disp_uname}<br />${ticket.created.isoformat()}</div></div>
             % endfor
             <p>Feel free to respond or add more information using the form below.</p>
@@ -75,10 +85,45 @@
             ${form|n}
             % endif
 
+            <hr>
+            <h4>History:</h4>
+            % if len(history['entries']) == 0:
+            <p>No changes have been recorded.</p>
+            % else:
+            <table class="table table-striped table-condensed table-bordered">
+                <thead>
+                    <tr><th>When</th><th>Who</th><th>Changes</th></tr>
+                </thead>
+                <tbody>
+                % for entry in history['entries']:
+                <tr>
+                    <td>${entry['created'].isoformat()}</td>
+                    <td>${entry['user'] or ''}</td>
+                    <td>
+                        <ul>
+                        % for (field, change) in entry['changes']:
+                            <li><b>${field}</b>: ${change}</li>
+                        % endfor
+                        </ul>
+                    </td>
+                </tr>
+                % endfor
+                </tbody>
+            </table>
+            <ul class="pager">
+                % if history['newer_url']:
+                <li><a href="${history['newer_url']}">Newer</a></li>
+                % endif
+                % if history['older_url']:
+                <li><a href="${history['older_url']}">Older</a></li>
+                % endif
+            </ul>
+            % endif
+
         </div>
     </div>
 </div>
 
 <%block name="title">${parent.title()} ${' - ' + page_title if page_title else ''}</%block>
-<%block name="flash"><%include file="../flash.mako" args="queue_name='event', alert_type='success'" /></%block>
+<%block name="flash"><%include file="../flash.mako" args="queue_name='cve', alert_type='success'" /></%block>
 
@@ -5,7 +5,16 @@
         <%include file="sidebar.mako" />
         <div id="Content" class="span9">
             <h3>${page_title if page_title else ''}</h3>
+            % if exports:
+            <p>Export:
+            % for (name, url) in exports:
+                <a href="${url}" class="btn btn-small">${name}</a>
+            % endfor
+            </p>
+            % endif
             % if cves:
+            <form action="${status_url}" method="POST">
+            <input type="hidden" name="csrf_token" value="${request.session.get_csrf_token()}" />
             <table class="table table-striped table-condensed table-bordered">
                 <thead>
                     <tr>
@@ -42,6 +51,8 @@
                             % else:
                                 None
                             % endif
+                        % elif type == 'select':
+                            <input type="checkbox" name="cve_id" value="${cve[it]}" />
                         % elif type == 'buttons':
                             % for button in cve[it]:
                                 <a href="${button[1]}" class="btn btn-small btn-primary">${button[0]}</a>
@@ -53,6 +64,15 @@
                 % endfor
                 </tbody>
             </table>
+            <p>Change the status of the selected to
+                <select name="status">
+                % for (value, name) in status_types:
+                    <option value="${value}">${name}</option>
+                % endfor
+                </select>
+                <button type="submit" class="btn btn-primary">Change status</button>
+            </p>
+            </form>
             % else:
                 Nothing found.
             %endif
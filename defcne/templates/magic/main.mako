@@ -5,6 +5,18 @@
         <%include file="sidebar.mako" />
         <div id="Content" class="span9">
             <h3>${page_title if page_title else ''}</h3>
+            <h4>Mail queue:</h4>
+            <ul>
+                <li><b>Pending:</b> ${mail_queue['depth']}</li>
+                <li><b>Oldest pending:</b> ${'{:.0f}s'.format(mail_queue['oldest']) if mail_queue['oldest'] is not None else 'None'}</li>
+                <li><b>Failed:</b> ${mail_queue['failed']}</li>
+                <li><b>Average delivery latency:</b> ${'{:.1f}s'.format(mail_queue['latency']) if mail_queue['latency'] is not None else 'None'}</li>
+            </ul>
+            <h4>Refused login attempts (this process):</h4>
+            <ul>
+                <li><b>Too many attempts for username:</b> ${login_shed['username']}</li>
+                <li><b>Too many attempts from address:</b> ${login_shed['address']}</li>
+            </ul>
 
         </div>
     </div>
@@ -0,0 +1,46 @@
+<%inherit file="../site.mako" />
+
+<div class="container-fluid">
+    <div class="row-fluid">
+        <%include file="sidebar.mako" />
+        <div id="Content" class="span9">
+            <h3>${page_title if page_title else ''}</h3>
+            <form class="form-search" action="${request.route_url('defcne.magic', traverse='search')}" method="GET">
+                <input type="text" class="input-xlarge search-query" name="q" value="${query}" placeholder="Name, summary, POC or ticket" />
+                <input type="text" class="input-mini" name="dc" value="${dc if dc is not None else ''}" placeholder="DEF CON" />
+                <button type="submit" class="btn">Search</button>
+            </form>
+            % if cves:
+            <table class="table table-striped table-condensed table-bordered">
+                <thead>
+                    <tr>
+                        <th>Name</th>
+                        <th>Type</th>
+                        <th>DEF CON</th>
+                        <th>Summary</th>
+                        <th>Status</th>
+                        <th>Matched</th>
+                    </tr>
+                </thead>
+                <tbody>
+                % for cve in cves:
+                <tr>
+                    <td><a href="${cve['url']}">${cve['disp_name']}</a></td>
+                    <td>${cve['type']}</td>
+                    <td>${cve['dc']}</td>
+                    <td>${cve['oneliner']}</td>
+                    <td>${cve['status']}</td>
+                    <td>${', '.join(cve['matched'])}</td>
+                </tr>
+                % endfor
+                </tbody>
+            </table>
+            % elif query:
+                Nothing found.
+            % endif
+        </div>
+    </div>
+</div>
+
+<%block name="title">${parent.title()} ${' - ' + page_title if page_title else ''}</%block>
+<%block name="flash"><%include file="../flash.mako" args="queue_name='magic', alert_type='success'" /></%block>
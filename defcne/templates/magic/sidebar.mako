@@ -6,8 +6,9 @@
             <li><a href="${request.route_url('defcne.magic', traverse=('events', '22'))}">Events</a></li>
             <li><a href="${request.route_url('defcne.magic', traverse=('villages', '22'))}">Villages</a></li>
             <li><a href="${request.route_url('defcne.magic', traverse=('users'))}">Users</a></li>
-            <li><a href="${request.route_url('defcne.magic', traverse=('badges'))}">Badges</a></li>
+            <li><a href="${request.route_url('defcne.magic', traverse=('badges', '22'))}">Badges</a></li>
             <li><a href="${request.route_url('defcne.magic', traverse=('email'))}">Email</a></li>
+            <li><a href="${request.route_url('defcne.magic', traverse=('search'))}">Search</a></li>
         </ul>
     </nav>
 </aside>
@@ -5,6 +5,21 @@
         <%include file="sidebar.mako" />
         <div id="Content" class="span9">
             <h3>${page_title if page_title else ''}</h3>
+            <form class="form-inline" method="GET" action="${request.resource_url(request.context)}">
+                <input type="text" name="q" placeholder="Username, name or email" value="${filters.get('q', '')}" />
+                <select name="group">
+                    <option value="">All groups</option>
+                    % for group in groups:
+                    <option value="${group}" ${'selected' if filters.get('group') == group else ''}>${group}</option>
+                    % endfor
+                </select>
+                <select name="validated">
+                    <option value="">Validated or not</option>
+                    <option value="1" ${'selected' if filters.get('validated') == '1' else ''}>Validated</option>
+                    <option value="0" ${'selected' if filters.get('validated') == '0' else ''}>Not validated</option>
+                </select>
+                <button type="submit" class="btn">Filter</button>
+            </form>
             % if users:
             <table class="table table-striped table-condensed table-bordered">
                 <thead>
@@ -40,6 +55,14 @@
                     % endfor
                 </tbody>
             </table>
+            <ul class="pager">
+                <li><a href="${first_url}">First</a></li>
+                % if next_url:
+                <li><a href="${next_url}">Next</a></li>
+                % endif
+            </ul>
+            % else:
+                Nothing found.
             %endif
         </div>
     </div>
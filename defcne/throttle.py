@@ -0,0 +1,109 @@
+# File: throttle.py
+# Author: Bert JW Regeer <bertjw@regeer.org>
+# Created: 2026-10-18
+
+import logging
+log = logging.getLogger(__name__)
+
+import threading
+import time
+
+from cache import cache_from_settings
+
+class TokenBucket(object):
+    """
+    A token bucket rate limiter with the bucket state stored in a cache
+
+    Each key may be used `burst` times in a row, after which it gains `rate`
+    tokens per second. With a shared cache backend the limit applies across
+    all processes. Reads and writes of a bucket are not atomic, so concurrent
+    attempts may occasionally let a single extra attempt through.
+    """
+
+    def __init__(self, cache, name, rate, burst):
+        if rate <= 0:
+            raise ValueError('The rate for {} has to be larger than 0'.format(name))
+
+        self.cache = cache
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+
+        # Once a bucket has had the time to refill it can be forgotten
+        self.ttl = int(burst / float(rate)) + 1
+
+    def allow(self, key, now=None):
+        if now is None:
+            now = time.time()
+
+        ckey = ('throttle', self.name, key)
+        state = self.cache.get(ckey)
+
+        if state is None:
+            tokens = float(self.burst)
+        else:
+            (tokens, last) = state
+            tokens = min(float(self.burst), tokens + (now - last) * self.rate)
+
+        if tokens < 1:
+            self.cache.set(ckey, (tokens, now), ttl=self.ttl)
+            return False
+
+        self.cache.set(ckey, (tokens - 1, now), ttl=self.ttl)
+        return True
+
+class LoginThrottle(object):
+    """
+    Admission control for credential checks
+
+    Login attempts are limited per username and per remote address, attempts
+    over the limit are refused before any password is checked. The amount of
+    refused attempts are counted (per process) in `shed`.
+    """
+
+    def __init__(self, cache, username_rate, username_burst, address_rate, address_burst):
+        self.username = TokenBucket(cache, 'username', username_rate, username_burst)
+        self.address = TokenBucket(cache, 'address', address_rate, address_burst)
+        self.shed = {'username': 0, 'address': 0}
+        self._lock = threading.Lock()
+
+    def _shed(self, reason, key):
+        with self._lock:
+            self.shed[reason] = self.shed[reason] + 1
+
+        log.warn('Refused login attempt, too many attempts for {} "{}"'.format(reason, key))
+
+    def allow(self, username, remote_addr):
+        if remote_addr is not None and not self.address.allow(remote_addr):
+            self._shed('address', remote_addr)
+            return False
+
+        if username and not self.username.allow(username.lower()):
+            self._shed('username', username)
+            return False
+
+        return True
+
+def throttle_from_settings(settings, prefix='defcne.login_throttle.'):
+    """
+    Create a LoginThrottle from the settings starting with `prefix`. Rates are
+    attempts per minute, bursts are the amount of attempts that may be made in
+    a row. The cache is configured using `prefix` + backend/servers.
+    """
+
+    rates = {}
+
+    for (name, default) in (('username_rate', 5), ('address_rate', 30)):
+        rates[name] = float(settings.get(prefix + name, default))
+
+        if rates[name] <= 0:
+            raise ValueError('{}{} has to be larger than 0'.format(prefix, name))
+
+    cache = cache_from_settings(settings, prefix, ttl=600, maxsize=10000)
+
+    return LoginThrottle(cache,
+            username_rate=rates['username_rate'] / 60,
+            username_burst=int(settings.get(prefix + 'username_burst', 10)),
+            address_rate=rates['address_rate'] / 60,
+            address_burst=int(settings.get(prefix + 'address_burst', 30)),
+            )
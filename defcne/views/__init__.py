@@ -1,5 +1,5 @@
 # Package
 
 from user import User
-from event import Event
+from cve import CVE
 from magic import Magic
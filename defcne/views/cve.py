@@ -0,0 +1,409 @@
+# File: cve.py
+# Author: Bert JW Regeer <bertjw@regeer.org>
+# Created: 2026-10-18
+
+import logging
+log = logging.getLogger(__name__)
+
+import venusian
+
+from pyramid.decorator import reify
+from pyramid.view import view_config
+from pyramid.httpexceptions import (
+        HTTPBadRequest,
+        HTTPSeeOther,
+        HTTPInternalServerError,
+        HTTPForbidden,
+        )
+
+from deform import (Form, ValidationFailure)
+
+from ..forms import TicketForm
+
+from ..events import (
+        CVECreated,
+        CVEUpdated,
+        CVETicketUpdated,
+        )
+
+from .. import models as m
+from ..cvetypes import (
+        cve_types,
+        name_cache_key,
+        )
+from ..logos import logo_url
+from ..listing import (
+        published_listing,
+        conditional_listing,
+        )
+from ..models.cvebase import status_types
+
+def ticket_page(request, cve_id, url):
+    """
+    Returns the page of tickets for `cve_id` asked for in the request (the
+    last page by default), with the URL's of the previous and next pages as
+    generated by `url(page)`.
+    """
+
+    try:
+        page = int(request.GET['page'])
+    except (KeyError, ValueError):
+        page = None
+
+    tickets = m.Ticket.paginate(cve_id, page)
+
+    tickets['prev_url'] = url(tickets['page'] - 1) if tickets['page'] > 0 else None
+    tickets['next_url'] = url(tickets['page'] + 1) if tickets['page'] < tickets['pages'] - 1 else None
+
+    return tickets
+
+class cve_view_config(object):
+    """
+    Like view_config, but registers the view on the route of every CVE type
+    in cvetypes, so a single view serves all of the CVE types.
+    """
+
+    venusian = venusian
+
+    def __init__(self, **settings):
+        self.__dict__.update(settings)
+
+    def __call__(self, wrapped):
+        settings = self.__dict__.copy()
+
+        def callback(context, name, ob):
+            config = context.config.with_package(info.module)
+
+            for cvetype in cve_types.values():
+                config.add_view(view=ob, route_name=cvetype.route, **settings)
+
+        info = self.venusian.attach(wrapped, callback, category='pyramid')
+
+        if info.scope == 'class':
+            if settings.get('attr') is None:
+                settings['attr'] = wrapped.__name__
+
+        return wrapped
+
+class CVE(object):
+    """View for Contest/Village/Event functionality"""
+
+    def __init__(self, context, request):
+        self.context = context
+        self.request = request
+
+    @reify
+    def type(self):
+        return self.context.type
+
+    def _urls(self, cve):
+        return {
+                'manage': self.request.route_url(self.type.route, traverse=(cve.dc, cve.id, 'manage')),
+                'edit': self.request.route_url(self.type.route, traverse=(cve.dc, cve.id, 'edit')),
+                'extrainfo': self.request.route_url(self.type.route, traverse=(cve.dc, cve.id, 'extrainfo')),
+                }
+
+    def _name_url(self, dc):
+        return self.request.route_url(self.type.route, traverse=('available',), _query={'dc': dc})
+
+    def _save_logo(self, appstruct):
+        if appstruct['logo'] is None:
+            return None
+
+        try:
+            return self.request.registry.logo_store.save(appstruct['logo']['fp'], appstruct['logo']['filename'])
+        except (IOError, OSError), e:
+            log.error('Unable to store logo: {}'.format(e))
+            raise HTTPInternalServerError()
+
+    @cve_view_config(context='..acl.CVEs', renderer='event/form.mako', permission='create', name='create', create_allowed=True)
+    def create(self):
+        (schema, f) = self.type.form.create_form(request=self.request,
+            action=self.request.current_route_url(), type=self.type.name, dc=22)
+        return {
+                'form': f.render(),
+                'page_title': 'Submit {} Proposal'.format(self.type.title),
+                'explanation': None,
+                'name_url': self._name_url(22),
+                }
+
+    @cve_view_config(context='..acl.CVEs', renderer='disabled.mako', permission='create', name='create', create_allowed=False)
+    def create_disabled(self):
+        self.request.response.status_int = 404
+        return {
+                'page_title': 'Submit {} Proposal'.format(self.type.title),
+                }
+
+    @cve_view_config(context='..acl.CVEs', name='create', renderer='event/form.mako', permission='create', request_method='POST', create_allowed=True)
+    def create_submit(self):
+        controls = self.request.POST.items()
+        (schema, f) = self.type.form.create_form(request=self.request,
+                action=self.request.current_route_url(), type=self.type.name, dc=22)
+
+        try:
+            appstruct = f.validate(controls)
+            logo_path = self._save_logo(appstruct)
+
+            if logo_path is not None:
+                appstruct['logo_path'] = logo_path
+
+            cve = self.type.model()
+            changes = cve.from_appstruct(appstruct)
+
+            cve.owner = self.request.user.user
+            cve.dc = 22;
+
+            if appstruct['ticket']:
+                ticket = m.Ticket(ticket=appstruct['ticket'], user=self.request.user.user)
+                cve.tickets.append(ticket)
+
+            m.DBSession.add(cve)
+            m.DBSession.flush()
+
+            self.request.registry.notify(CVECreated(self.request, self.context, cve, changes=changes))
+            self.request.session.flash('Your {} has been created. You can make changes at any time. Staff has been notified.'.format(self.type.name), queue='cve')
+            return HTTPSeeOther(location = self.request.route_url(self.type.route, traverse=(cve.dc, cve.id, 'manage')))
+        except ValidationFailure, e:
+            if e.field['csrf_token'].error is not None:
+                e.field.error = e.field['csrf_token'].error
+                e.field['csrf_token'].cstruct = self.request.session.get_csrf_token()
+
+            return {
+                'form': e.render(),
+                'page_title': 'Submit {} Proposal'.format(self.type.title),
+                'explanation': None,
+                'name_url': self._name_url(22),
+                }
+
+    @cve_view_config(context='..acl.CVEs', name='available', renderer='json', permission='create')
+    def name_available(self):
+        """
+        Tell the create/edit forms whether a name is still available while it
+        is being typed. Names that are available are cached for a short time,
+        the form validation still checks the database when it is submitted.
+        """
+
+        name = self.request.GET.get('name', u'').strip()
+
+        try:
+            dc = int(self.request.GET.get('dc', 22))
+        except ValueError:
+            raise HTTPBadRequest()
+
+        if not name:
+            return {'name': name, 'available': False}
+
+        cache = self.request.registry.name_cache
+        key = name_cache_key(dc, self.type.name, name)
+
+        available = cache.get(key)
+
+        if available is None:
+            available = not m.CVEBase.name_taken(dc, self.type.name, name)
+
+            if available:
+                cache.set(key, True)
+
+        self.request.response.cache_control = 'private, max-age=5'
+
+        return {'name': name, 'available': available}
+
+    @cve_view_config(context=HTTPForbidden, containment='..acl.CVEs', renderer='event/accountneeded.mako')
+    def create_not_authed(self):
+        return {}
+
+    # If the user attempts to access a page that requires authorization, but
+    # they are not logged in, instead of sending them to the login page, we
+    # simply send them a not found page. Maybe not as nice for the user if they
+    # thought they were logged in, but at least management URL's don't get
+    # "advertised" with a "please login =)"
+    @cve_view_config(context=HTTPForbidden, containment='..acl.CVE', renderer='not_found.mako')
+    def not_authed(self):
+        self.request.status_int = 404
+        return {}
+
+    @cve_view_config(context='..acl.CVEs')
+    def main(self):
+        return HTTPSeeOther(location = self.request.route_url(self.type.route, traverse='22'))
+
+    @cve_view_config(context='..acl.DefconCVE', renderer='cve/all.mako')
+    def defcon(self):
+        listing = published_listing(self.request, self.context.dc, self.type.name)
+
+        not_modified = conditional_listing(self.request, listing)
+        if not_modified is not None:
+            return not_modified
+
+        return {
+                'listing': listing['html'],
+                'count': listing['count'],
+                'page_title': 'DEF CON {0}'.format(self.context.__name__),
+                'type': self.type.path,
+                }
+
+    @cve_view_config(context='..acl.CVE', renderer='event/one.mako', permission='view')
+    def cve(self):
+        cve = self.context.cve
+        e = cve.to_appstruct()
+        e['url'] = self.request.route_url(self.type.route, traverse=(cve.dc, cve.id))
+
+        return {
+                'page_title': '{}'.format(cve.disp_name),
+                'event': e,
+                }
+
+    @view_config(context='..acl.CVE', containment='..acl.Magic', route_name='defcne.magic', name='edit', renderer='magic/edit.mako', permission='magic')
+    @cve_view_config(context='..acl.CVE', name='edit', renderer='cve/edit.mako', permission='edit')
+    def edit(self):
+        cve = self.context.cve
+
+        e = {}
+        e['name'] = cve.disp_name
+        e['url'] = self._urls(cve)
+
+        astruct = cve.to_appstruct()
+        astruct['name'] = astruct['disp_name']
+
+        (schema, f) = self.type.form.create_form(request=self.request,
+                action=self.request.current_route_url(), type=self.type.name, origname=cve.name, dc=cve.dc)
+
+        if cve.logo:
+            schema['logo'].description = "A logo has already been uploaded. Uploading a new logo will overwrite the previous logo!"
+        del astruct['logo']
+        del schema['ticket']
+
+        f = Form(schema, action=self.request.current_route_url(), buttons=self.type.form.__buttons__)
+
+        return {
+                'page_title': 'Edit {}: {}'.format(self.type.title, cve.disp_name),
+                'cve': e,
+                'form': f.render(astruct),
+                'type': self.type.name,
+                'name_url': self._name_url(cve.dc),
+                'origname': cve.name,
+                }
+
+    @view_config(context='..acl.CVE', containment='..acl.Magic', route_name='defcne.magic', name='edit', renderer='magic/edit.mako', request_method='POST', permission='magic')
+    @cve_view_config(context='..acl.CVE', name='edit', renderer='cve/edit.mako', permission='edit', request_method='POST')
+    def edit_submit(self):
+        cve = self.context.cve
+
+        e = {}
+        e['name'] = cve.disp_name
+        e['url'] = self._urls(cve)
+
+        controls = self.request.POST.items()
+        (schema, f) = self.type.form.create_form(request=self.request,
+                action=self.request.current_route_url(), type=self.type.name, origname=cve.name, dc=cve.dc)
+        del schema['ticket']
+        f = Form(schema, action=self.request.current_route_url(), buttons=self.type.form.__buttons__)
+
+        try:
+            appstruct = f.validate(controls)
+            logo_path = self._save_logo(appstruct)
+
+            if logo_path is not None:
+                appstruct['logo_path'] = logo_path
+
+            changes = cve.from_appstruct(appstruct)
+
+            if changes:
+                self.request.registry.notify(CVEUpdated(self.request, self.context, cve, changes=changes))
+                self.request.session.flash('Your {} has been updated!'.format(self.type.name), queue='cve')
+            else:
+                self.request.session.flash('Nothing was changed.', queue='cve')
+
+            # Depending on what route was matched we do something different.
+            if self.request.matched_route.name == "defcne.magic":
+                return HTTPSeeOther(location = self.request.resource_url(self.context))
+            else:
+                return HTTPSeeOther(location = self.request.resource_url(self.context, 'manage'))
+        except ValidationFailure, ef:
+            if ef.field['csrf_token'].error is not None:
+                ef.field.error = ef.field['csrf_token'].error
+                ef.field['csrf_token'].cstruct = self.request.session.get_csrf_token()
+
+            return {
+                'form': ef.render(),
+                'page_title': 'Edit {}: {}'.format(self.type.title, cve.disp_name),
+                'cve': e,
+                'type': self.type.name,
+                'name_url': self._name_url(cve.dc),
+                'origname': cve.name,
+                }
+
+    @cve_view_config(context='..acl.CVE', name='manage', renderer='cve/manage.mako', permission='manage')
+    def manage(self):
+        cve = self.context.cve
+
+        e = cve.to_appstruct()
+        e['logo'] = logo_url(self.request, cve.logo, 200)
+        e['owner'] = cve.owner.disp_uname
+        e['requests'] = m.Ticket.count_tickets(cve.id)
+        e['status'] = status_types[cve.status]
+        e['url'] = self._urls(cve)
+
+        return {
+                'page_title': "Manage {}: {}".format(self.type.title, cve.disp_name),
+                'cve': e,
+                'listitems': self.type.listitems(e),
+                'type': self.type.name,
+                }
+
+    @cve_view_config(context='..acl.CVE', name='extrainfo', renderer='cve/extrainfo.mako', permission='edit')
+    def extrainfo(self):
+        cve = self.context.cve
+
+        e = {}
+        e['name'] = cve.name
+        e['tickets'] = ticket_page(self.request, cve.id,
+                lambda page: self.request.route_url(self.type.route, traverse=(cve.dc, cve.id, 'extrainfo'), _query={'page': page}))
+        e['url'] = self._urls(cve)
+
+        schema = TicketForm().bind(request=self.request)
+        f = Form(schema, action=self.request.current_route_url(), buttons=('submit',))
+
+        return {
+                'page_title': 'Additional info for {}: {}'.format(self.type.name, cve.disp_name),
+                'cve': e,
+                'form': f.render(),
+                'type': self.type.name,
+                }
+
+    @cve_view_config(context='..acl.CVE', name='extrainfo', renderer='cve/extrainfo.mako', permission='edit', request_method='POST')
+    def extrainfo_submit(self):
+        cve = self.context.cve
+
+        e = {}
+        e['name'] = cve.name
+        e['tickets'] = {'tickets': [], 'prev_url': None, 'next_url': None}
+        e['url'] = self._urls(cve)
+
+        controls = self.request.POST.items()
+        schema = TicketForm().bind(request=self.request)
+        f = Form(schema, action=self.request.current_route_url(), buttons=('submit',))
+
+        try:
+            appstruct = f.validate(controls)
+
+            if len(appstruct['ticket']) == 0:
+                return HTTPSeeOther(location = self.request.current_route_url())
+
+            ticket = m.Ticket(ticket=appstruct['ticket'], user=self.request.user.user)
+            cve.tickets.append(ticket)
+
+            self.request.registry.notify(CVETicketUpdated(ticket, self.request, self.context, cve))
+            self.request.session.flash('Your updated information has been added.', queue='cve_info')
+            return HTTPSeeOther(location = self.request.current_route_url())
+
+        except ValidationFailure, ef:
+            if ef.field['csrf_token'].error is not None:
+                ef.field.error = ef.field['csrf_token'].error
+                ef.field['csrf_token'].cstruct = self.request.session.get_csrf_token()
+
+            return {
+                'page_title': 'Additional info for {}: {}'.format(self.type.name, cve.disp_name),
+                'cve': e,
+                'form': ef.render(),
+                'type': self.type.name,
+                }
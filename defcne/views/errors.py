@@ -26,3 +26,8 @@ def forbidden(context, request):
 
     loc = request.route_url('defcne.user', traverse='auth', _query=(('next', request.path),))
     return HTTPSeeOther(location=loc)
+
+def busy(context, request):
+    request.response.status_int = 503
+    request.response.retry_after = 5
+    return {}
@@ -13,9 +13,12 @@ from pyramid.view import (
         )
 from pyramid.security import authenticated_userid
 from pyramid.httpexceptions import (
+        HTTPBadRequest,
         HTTPSeeOther,
         HTTPNotFound,
         )
+from pyramid.response import Response
+from pyramid.session import check_csrf_token
 
 import transaction
 
@@ -25,17 +28,62 @@ from deform import (Form, ValidationFailure)
 from ..forms import (
         TicketForm,
         MagicUserEdit,
-        EventManagement,
-        ContestManagement,
-        VillageManagement,
+        )
+
+from ..events import (
+        CVEStatusChanged,
+        CVEUpdated,
         )
 
 from .. import models as m
+from ..auth import invalidate_user
+from ..cvetypes import cve_types
+from ..export import (
+        csv_lines,
+        export_rows,
+        fields,
+        jsonl_lines,
+        )
+from ..logos import logo_url
 from ..models.cvebase import (
         status_types,
         badge_types,
+        set_changed,
         )
 
+from .cve import ticket_page
+
+def _describe_changes(diff, prefix=''):
+    """
+    Turn a diff stored in the CVE history into a list of (field, description)
+    """
+
+    lines = []
+
+    for (field, change) in sorted(diff.items()):
+        name = prefix + field
+
+        if isinstance(change, list):
+            (old, new) = change
+
+            if field == 'status':
+                (old, new) = (status_types.get(old, old), status_types.get(new, new))
+
+            lines.append((name, u'{} \u2192 {}'.format(old, new)))
+        elif set(change).issubset(('added', 'updated', 'deleted')):
+            for values in change.get('added', []):
+                lines.append((name, u'added ' + u', '.join(u'{}: {}'.format(k, v) for (k, v) in sorted(values.items()))))
+
+            for values in change.get('updated', []):
+                lines.append((name, u'updated #{} '.format(values['id']) + u', '.join(u'{}: {} \u2192 {}'.format(k, v[0], v[1]) for (k, v) in sorted(values.items()) if k != 'id')))
+
+            for cid in change.get('deleted', []):
+                lines.append((name, u'deleted #{}'.format(cid)))
+        else:
+            lines.extend(_describe_changes(change, name + '.'))
+
+    return lines
+
 @view_defaults(context='..acl.Magic', containment='..acl.Magic', route_name='defcne.magic', permission='magic')
 class Magic(object):
     """View for Magic functionality"""
@@ -48,406 +96,296 @@ class Magic(object):
     def main(self):
         return {
                 'page_title': 'Magic Portal',
+                'mail_queue': m.MailOutbox.stats(),
+                'login_shed': self.request.registry.login_throttle.shed,
                 }
 
-    @view_config(context='..acl.Events')
-    def dcyears(self):
-        return HTTPSeeOther(location=self.request.route_url('defcne.magic', traverse=('events', '22')))
+    def _search(self):
+        params = self.request.GET
+        query = params.get('q', u'').strip()
 
-    @view_config(context='..acl.DefconEvent', renderer='magic/cves.mako')
-    def dcevents(self):
-        all_events = m.DBSession.query(m.Event).filter(m.Event.dc == self.context.__name__).order_by(m.Event.name.asc())
+        try:
+            dc = int(params['dc']) if params.get('dc') else None
+        except ValueError:
+            raise HTTPBadRequest()
 
-        if 'filter' in self.request.GET:
-            try:
-                filterby = int(self.request.GET['filter'])
-                all_events = all_events.filter(m.Event.status == filterby)
-            except ValueError:
-                pass
+        results = m.search_cves(query, dc=dc) if query else []
+        ids = [cve_id for (cve_id, _, _) in results]
 
-        all_events = all_events.all()
+        found = {}
+        if ids:
+            c = m.CVEBase
+            for row in m.DBSession.query(c.id, c.type, c.dc, c.disp_name, c.oneliner, c.status).filter(c.id.in_(ids)):
+                found[row.id] = row
 
-        events = []
-        for event in all_events:
-            e = event.to_appstruct()
-            e['owner'] = event.owner.disp_uname
-            e['status'] = status_types[event.status]
-            e['edit_url'] = ('Edit', self.request.resource_url(self.context, event.id, 'edit'))
-            e['manage_url'] = ('Manage', self.request.resource_url(self.context, event.id, 'manage'))
-            e['magic_url'] = (e['disp_name'], self.request.resource_url(self.context, event.id))
-            e['buttons'] = [e['edit_url'], e['manage_url']]
-            events.append(e)
+        cves = []
+        for (cve_id, rank, kinds) in results:
+            cve = found.get(cve_id)
 
-        listitems = [
-                ('magic_url', 'Event Name', 'url'),
-                ('owner', 'Owner', 'text'),
-                ('oneliner', 'Summary', 'text'),
-                ('status', 'Status', 'text'),
-                ('buttons', '', 'buttons'),
-                ]
+            if cve is None or cve.type not in cve_types:
+                continue
+
+            cves.append({
+                'id': cve.id,
+                'type': cve.type,
+                'dc': cve.dc,
+                'disp_name': cve.disp_name,
+                'oneliner': cve.oneliner,
+                'status': status_types[cve.status],
+                'matched': sorted(kinds),
+                'rank': rank,
+                'url': self.request.route_url('defcne.magic', traverse=(cve_types[cve.type].path, cve.dc, cve.id)),
+                })
 
         return {
-                'page_title': 'All Events',
-                'cves': events,
-                'listitems': listitems,
+                'query': query,
+                'dc': dc,
+                'cves': cves,
                 }
 
-    @view_config(context='..acl.DefconContest', renderer='magic/cves.mako')
-    def dccontests(self):
-        all_contests = m.DBSession.query(m.Contest).filter(m.Contest.dc == self.context.__name__).order_by(m.Contest.name.asc())
-
-        if 'filter' in self.request.GET:
-            try:
-                filterby = int(self.request.GET['filter'])
-                all_contests = all_contests.filter(m.Contest.status == filterby)
-            except ValueError:
-                pass
-
-        all_contests = all_contests.all()
+    @view_config(containment=None, name='search', renderer='magic/search.mako')
+    def search(self):
+        result = self._search()
+        result['page_title'] = 'Search'
+        return result
 
-        contests = []
-        for contest in all_contests:
-            e = contest.to_appstruct()
-            e['owner'] = contest.owner.disp_uname
-            e['status'] = status_types[contest.status]
-            e['edit_url'] = ('Edit', self.request.resource_url(self.context, contest.id, 'edit'))
-            e['manage_url'] = ('Manage', self.request.resource_url(self.context, contest.id, 'manage'))
-            e['magic_url'] = (e['disp_name'], self.request.resource_url(self.context, contest.id))
-            e['buttons'] = [e['edit_url'], e['manage_url']]
-            contests.append(e)
+    @view_config(containment=None, name='search', accept='application/json', renderer='json')
+    def search_json(self):
+        return self._search()
 
-        listitems = [
-                ('magic_url', 'Contest Name', 'url'),
-                ('owner', 'Owner', 'text'),
-                ('oneliner', 'Summary', 'text'),
-                ('status', 'Status', 'text'),
-                ('buttons', '', 'buttons'),
-                ]
+    @view_config(context='..acl.CVEs')
+    def dcyears(self):
+        return HTTPSeeOther(location=self.request.route_url('defcne.magic', traverse=(self.context.type.path, '22')))
 
-        return {
-                'page_title': 'All Contests',
-                'cves': contests,
-                'listitems': listitems,
-                }
+    def _dclisting(self, model):
+        """
+        Build the rows for the listing of all CVE's of type `model` for the
+        DEF CON in the context. Only the columns that are displayed are loaded,
+        and the owners are joined in the same query.
+        """
 
-    @view_config(context='..acl.DefconVillage', renderer='magic/cves.mako')
-    def dcvillages(self):
-        all_villages = m.DBSession.query(m.Village).filter(m.Village.dc == self.context.__name__).order_by(m.Village.name.asc())
+        filterby = None
 
         if 'filter' in self.request.GET:
             try:
                 filterby = int(self.request.GET['filter'])
-                all_villages = all_villages.filter(m.Village.status == filterby)
             except ValueError:
                 pass
 
-        all_villages = all_villages.all()
+        all_cves = model.listing(self.context.__name__, status=filterby,
+                columns=('type', 'dc', 'disp_name', 'oneliner', 'status', 'user_id'),
+                relations=('owner',))
 
-        villages = []
-        for village in all_villages:
-            e = village.to_appstruct()
-            e['owner'] = village.owner.disp_uname
-            e['status'] = status_types[village.status]
-            e['edit_url'] = ('Edit', self.request.resource_url(self.context, village.id, 'edit'))
-            e['manage_url'] = ('Manage', self.request.resource_url(self.context, village.id, 'manage'))
-            e['magic_url'] = (e['disp_name'], self.request.resource_url(self.context, village.id))
+        all_cves = all_cves.all()
+        ticket_counts = m.Ticket.count_by_cve([cve.id for cve in all_cves])
+
+        cves = []
+        for cve in all_cves:
+            e = {}
+            e['id'] = cve.id
+            e['disp_name'] = cve.disp_name
+            e['oneliner'] = cve.oneliner
+            e['owner'] = cve.owner.disp_uname
+            e['status'] = status_types[cve.status]
+            e['ticket_count'] = ticket_counts[cve.id]
+            e['edit_url'] = ('Edit', self.request.resource_url(self.context, cve.id, 'edit'))
+            e['manage_url'] = ('Manage', self.request.resource_url(self.context, cve.id, 'manage'))
+            e['magic_url'] = (e['disp_name'], self.request.resource_url(self.context, cve.id))
             e['buttons'] = [e['edit_url'], e['manage_url']]
-            villages.append(e)
+            e['select'] = cve.id
+            cves.append(e)
+
+        return cves
+
+    @view_config(context='..acl.DefconCVE', renderer='magic/cves.mako')
+    def dccves(self):
+        cvetype = self.context.type
+        cves = self._dclisting(cvetype.model)
 
         listitems = [
-                ('magic_url', 'Village Name', 'url'),
+                ('select', '', 'select'),
+                ('magic_url', '{} Name'.format(cvetype.title), 'url'),
                 ('owner', 'Owner', 'text'),
                 ('oneliner', 'Summary', 'text'),
                 ('status', 'Status', 'text'),
+                ('ticket_count', 'Tickets', 'text'),
                 ('buttons', '', 'buttons'),
                 ]
 
         return {
-                'page_title': 'All Villages',
-                'cves': villages,
+                'page_title': 'All {}'.format(cvetype.path.capitalize()),
+                'cves': cves,
                 'listitems': listitems,
+                'exports': [
+                    ('CSV', self.request.resource_url(self.context, 'export.csv')),
+                    ('JSON', self.request.resource_url(self.context, 'export.jsonl')),
+                    ],
+                'status_url': self.request.resource_url(self.context, 'status'),
+                'status_types': sorted(status_types.items()),
                 }
 
-    @view_config(context='..acl.Event', renderer='magic/cve.mako')
-    def event(self):
-        event = self.context.event
-
-        e = event.to_appstruct()
-        e['logo'] = self.request.registry.settings['defcne.upload_path'] + event.logo if event.logo else ''
-        e['status'] = status_types[event.status]
-
-        e['owner'] = event.owner.disp_uname
-        e['ticket_count'] = len(m.Ticket.find_tickets(event.id))
-        e['tickets'] = m.Ticket.find_tickets(event.id)
+    def _export(self, ext, content_type, lines):
+        """
+        Stream all of the CVE's for the DEF CON in the context. The rows are
+        read from their own connection while the response is sent, as the
+        request's transaction has already ended by then.
+        """
 
-        e['edit_url'] = ('Edit', self.request.resource_url(self.context, 'edit'))
-        e['manage_url'] = ('Manage', self.request.resource_url(self.context, 'manage'))
-        e['magic_url'] = (e['disp_name'], self.request.resource_url(self.context))
-        e['buttons'] = [e['edit_url'], e['manage_url']]
-
-        poc_listitems = [
-                ('name', 'Name', 'text'),
-                ('email', 'Email', 'text'),
-                ('cellphone', 'Cellphone', 'text'),
-                ]
-
-        onsite_listitems = [
-                ('tables', 'Tables', 'text'),
-                ('chairs', 'Chairs', 'text'),
-                ('stage', 'Stage', 'boolean'),
-                ('location', 'Location', 'text'),
-                ('mobilebar', 'Mobile Bar', 'text'),
-                ]
+        cvetype = self.context.type
+        rows = export_rows(m.DBSession.get_bind(), cvetype.model, int(self.context.dc))
 
-        listitems = [
-                ('onsite', 'Onsite', 'boolean'),
-                ('official', 'Official', 'boolean'),
-                ('security', 'Security', 'boolean'),
-                ('signage', 'Signage', 'text'),
-                ((poc_listitems, 'pocs'), 'Points of Contact', 'list'),
-                ('ticket_count', 'Amount of tickets', 'text'),
+        response = Response(content_type=content_type, charset='utf-8')
+        response.app_iter = lines(rows, cvetype.model)
+        response.content_disposition = 'attachment; filename="{}-{}.{}"'.format(cvetype.path, self.context.dc, ext)
+        response.cache_control = 'no-store'
+        return response
 
-               ]
+    @view_config(context='..acl.DefconCVE', name='export.csv')
+    def dccves_csv(self):
+        return self._export('csv', 'text/csv', lambda rows, model: csv_lines(rows, fields(model)))
 
-        if e['onsite'] and 'space' in e:
-            listitems.append(((onsite_listitems, 'space'), 'Onsite Space Requirements', 'sub'))
+    @view_config(context='..acl.DefconCVE', name='export.jsonl')
+    def dccves_jsonl(self):
+        return self._export('jsonl', 'application/x-ndjson', lambda rows, model: jsonl_lines(rows))
 
-        listitems.append(('buttons', '', 'buttons'))
+    def _set_status(self, ids, status):
+        """
+        Set the status of the CVE's with `ids` for the DEF CON in the context,
+        with one UPDATE, one audit entry per changed CVE and one notification
+        for all of them. Returns a list of (id, old status) that were changed.
+        """
 
-        schema = TicketForm().bind(request=self.request)
-        f = Form(schema, action=self.request.resource_url(self.context, 'extrainfo'), buttons=('submit',))
+        check_csrf_token(self.request)
 
-        return {
-                'page_title': '{}'.format(event.disp_name),
-                'cve': e,
-                'listitems': listitems,
-                'form': f.render()
-                }
+        try:
+            ids = [int(x) for x in ids]
+            status = int(status)
+        except (TypeError, ValueError):
+            raise HTTPBadRequest()
 
-    @view_config(context='..acl.Contest', renderer='magic/cve.mako')
-    def contest(self):
-        contest = self.context.contest
+        if status not in status_types:
+            raise HTTPBadRequest()
 
-        e = contest.to_appstruct()
-        e['logo'] = self.request.registry.settings['defcne.upload_path'] + contest.logo if contest.logo else ''
-        e['status'] = status_types[contest.status]
+        changed = self.context.type.model.set_status(self.context.dc, ids, status)
 
-        e['owner'] = contest.owner.disp_uname
-        e['ticket_count'] = len(m.Ticket.find_tickets(contest.id))
-        e['tickets'] = m.Ticket.find_tickets(contest.id)
+        m.CVEHistory.record_many(self.request.user.user.id,
+                [(cid, {'status': [old, status]}) for (cid, old) in changed])
 
-        e['edit_url'] = ('Edit', self.request.resource_url(self.context, 'edit'))
-        e['manage_url'] = ('Manage', self.request.resource_url(self.context, 'manage'))
-        e['magic_url'] = (e['disp_name'], self.request.resource_url(self.context))
-        e['buttons'] = [e['edit_url'], e['manage_url']]
+        if changed:
+            self.request.registry.notify(CVEStatusChanged(self.request, self.context, changed, status))
 
-        power_listitems = [
-                ('outlets', 'Outlets', 'text'),
-                ('justification', 'Justification', 'text'),
-                ('threephase', 'Three Phase', 'boolean'),
-                ]
+        return changed
 
-        drop_listitems = [
-                ('justification', 'Justification', 'text')
-                ]
+    @view_config(context='..acl.DefconCVE', name='status', request_method='POST')
+    def dccves_status(self):
+        changed = self._set_status(self.request.POST.getall('cve_id'), self.request.POST.get('status'))
 
-        ap_listitems = [
-                ('hwmac', 'HW MAC', 'text'),
-                ('apbrand', 'Access Point Brand', 'text'),
-                ('ssid', 'SSID', 'text'),
-                ]
+        self.request.session.flash('The status of {} {} has been changed to {}.'.format(len(changed),
+            self.context.type.path, status_types[int(self.request.POST['status'])]), queue='magic')
+        return HTTPSeeOther(location=self.request.resource_url(self.context))
 
-        poc_listitems = [
-                ('name', 'Name', 'text'),
-                ('email', 'Email', 'text'),
-                ('cellphone', 'Cellphone', 'text'),
-                ]
+    @view_config(context='..acl.DefconCVE', name='status', request_method='POST', header='Content-Type:application/json', renderer='json')
+    def dccves_status_json(self):
+        try:
+            body = self.request.json_body
+            ids = body['ids']
+            status = body['status']
+        except (ValueError, KeyError, TypeError):
+            raise HTTPBadRequest()
 
-        listitems = [
-                ('hrsofoperation', 'Hours of Operation', 'text'),
-                ((power_listitems, 'power'), 'Power', 'list'),
-                ('spacereq', 'Space Requirements', 'text'),
-                ('tables', 'Tables', 'text'),
-                ('chairs', 'Chairs', 'text'),
-                ('signage', 'Signage', 'text'),
-                ('projectors', 'Projectors', 'text'),
-                ('screens', 'Screens', 'text'),
-                ((drop_listitems, 'drops'), 'Wired Ethernet', 'list'),
-                ((ap_listitems, 'aps'), 'Access Points', 'list'),
-                ('represent', 'Representation', 'text'),
-                ('numparticipants', 'Number of participants', 'text'),
-                ('years', 'Years Ran', 'text'),
-                ('signage', 'Signage', 'text'),
-                ((poc_listitems, 'pocs'), 'Points of Contact', 'list'),
-                ('blackbadge_consideration', 'Blackbadge', 'text'),
-                ('ticket_count', 'Amount of tickets', 'text'),
-                ('buttons', '', 'buttons'),
-                ]
+        # The ids have to be a list of numbers, anything else (such as a
+        # string, which would be taken apart digit by digit) is refused
+        if not isinstance(ids, list) or not all(isinstance(x, (int, long)) and not isinstance(x, bool) for x in ids):
+            raise HTTPBadRequest()
 
-        schema = TicketForm().bind(request=self.request)
-        f = Form(schema, action=self.request.resource_url(self.context, 'extrainfo'), buttons=('submit',))
+        changed = self._set_status(ids, status)
 
         return {
-                'page_title': '{}'.format(contest.disp_name),
-                'cve': e,
-                'listitems': listitems,
-                'form': f.render()
+                'status': status_types[int(body['status'])],
+                'changed': [{'id': cid, 'status': status_types[old]} for (cid, old) in changed],
                 }
 
-    @view_config(context='..acl.Village', renderer='magic/cve.mako')
-    def village(self):
-        village = self.context.village
+    def _cve(self, form):
+        """
+        Build the page for the CVE in the context, with `form` as the form for
+        adding additional information.
+        """
+
+        cve = self.context.cve
 
-        e = village.to_appstruct()
-        e['logo'] = self.request.registry.settings['defcne.upload_path'] + village.logo if village.logo else ''
-        e['status'] = status_types[village.status]
+        e = cve.to_appstruct()
+        e['logo'] = logo_url(self.request, cve.logo, 200)
+        e['status'] = status_types[cve.status]
 
-        e['owner'] = village.owner.disp_uname
-        e['ticket_count'] = len(m.Ticket.find_tickets(village.id))
-        e['tickets'] = m.Ticket.find_tickets(village.id)
+        e['owner'] = cve.owner.disp_uname
+        e['tickets'] = ticket_page(self.request, cve.id,
+                lambda page: self.request.resource_url(self.context, query={'page': page}))
+        e['ticket_count'] = e['tickets']['count']
 
         e['edit_url'] = ('Edit', self.request.resource_url(self.context, 'edit'))
         e['manage_url'] = ('Manage', self.request.resource_url(self.context, 'manage'))
         e['magic_url'] = (e['disp_name'], self.request.resource_url(self.context))
         e['buttons'] = [e['edit_url'], e['manage_url']]
 
-        power_listitems = [
-                ('outlets', 'Outlets', 'text'),
-                ('justification', 'Justification', 'text'),
-                ('threephase', 'Three Phase', 'boolean'),
-                ]
-
-        drop_listitems = [
-                ('justification', 'Justification', 'text')
-                ]
-
-        ap_listitems = [
-                ('hwmac', 'HW MAC', 'text'),
-                ('apbrand', 'Access Point Brand', 'text'),
-                ('ssid', 'SSID', 'text'),
-                ]
-
-        poc_listitems = [
-                ('name', 'Name', 'text'),
-                ('email', 'Email', 'text'),
-                ('cellphone', 'Cellphone', 'text'),
-                ]
-
-        listitems = [
-                ('hrsofoperation', 'Hours of Operation', 'text'),
-                ((power_listitems, 'power'), 'Power', 'list'),
-                ('spacereq', 'Space Requirements', 'text'),
-                ('tables', 'Tables', 'text'),
-                ('chairs', 'Chairs', 'text'),
-                ('signage', 'Signage', 'text'),
-                ('projectors', 'Projectors', 'text'),
-                ('screens', 'Screens', 'text'),
-                ((drop_listitems, 'drops'), 'Wired Ethernet', 'list'),
-                ((ap_listitems, 'aps'), 'Access Points', 'list'),
-                ('numparticipants', 'Number of participants', 'text'),
-                ('years', 'Years Ran', 'text'),
-                ('signage', 'Signage', 'text'),
-                ((poc_listitems, 'pocs'), 'Points of Contact', 'list'),
-                ('quiet_time', 'Quiet Time', 'boolean'),
-                ('sharing', 'Sharing', 'boolean'),
-                ('buttons', '', 'buttons'),
-                ]
-
-        schema = TicketForm().bind(request=self.request)
-        f = Form(schema, action=self.request.resource_url(self.context, 'extrainfo'), buttons=('submit',))
+        listitems = self.context.type.listitems(e)
+        listitems.append(('ticket_count', 'Amount of tickets', 'text'))
+        listitems.append(('buttons', '', 'buttons'))
 
         return {
-                'page_title': '{}'.format(village.disp_name),
+                'page_title': '{}'.format(cve.disp_name),
                 'cve': e,
                 'listitems': listitems,
-                'form': f.render()
+                'form': form,
+                'history': self._history(cve),
                 }
 
-    @view_config(context='..acl.Event', name='extrainfo', request_method='POST')
-    def event_extrainfo(self):
-        event = self.context.event
-
-        controls = self.request.POST.items()
-        schema = TicketForm().bind(request=self.request)
-        f = Form(schema, action=self.request.resource_url(self.context), buttons=('submit',))
+    def _history(self, cve, per_page=20):
+        """
+        Returns the page of the history of `cve` asked for in the request, the
+        newest changes first.
+        """
 
         try:
-            appstruct = f.validate(controls)
+            page = int(self.request.GET['history'])
+        except (KeyError, ValueError):
+            page = 0
 
-            if len(appstruct['ticket']) == 0:
-                return HTTPSeeOther(location = self.request.resource_url(self.context))
+        count = m.CVEHistory.count_history(cve.id)
+        pages = max(1, (count + per_page - 1) // per_page)
+        page = min(max(page, 0), pages - 1)
 
-            ticket = m.Ticket(ticket=appstruct['ticket'], user=self.request.user.user)
-            event.tickets.append(ticket)
+        entries = []
 
-            #self.request.registry.notify(ContestEventTicketUpdated(ticket, self.request, self.context, event))
-            self.request.session.flash('The information has been added to the event', queue='event')
-            return HTTPSeeOther(location = self.request.resource_url(self.context))
+        if count:
+            for entry in m.CVEHistory.find_history(cve.id, page=page, per_page=per_page):
+                entries.append({
+                    'user': entry.user.disp_uname if entry.user else None,
+                    'created': entry.created,
+                    'changes': _describe_changes(entry.diff),
+                    })
 
-        except ValidationFailure, failed:
-            e = event.to_appstruct()
-            e['logo'] = self.request.registry.settings['defcne.upload_path'] + event.logo if event.logo else ''
-            e['status'] = status_types[event.status]
-            e['owner'] = event.owner.disp_uname
-            e['ticket_count'] = len(m.Ticket.find_tickets(event.id))
-            e['tickets'] = m.Ticket.find_tickets(event.id)
-
-            e['edit_url'] = self.request.resource_url(self.context, event.id, 'edit')
-            e['manage_url'] = self.request.resource_url(self.context, event.id, 'manage')
-            e['magic_url'] = self.request.resource_url(self.context, event.id)
-
-            return {
-                    'page_title': '{}'.format(event.disp_name),
-                    'event': e,
-                    'form': failed.render()
-                    }
+        url = lambda page: self.request.resource_url(self.context, query={'history': page})
 
-    @view_config(context='..acl.Contest', name='extrainfo', request_method='POST')
-    def contest_extrainfo(self):
-        contest = self.context.contest
+        return {
+                'entries': entries,
+                'newer_url': url(page - 1) if page > 0 else None,
+                'older_url': url(page + 1) if page < pages - 1 else None,
+                }
 
-        controls = self.request.POST.items()
+    @view_config(context='..acl.CVE', renderer='magic/cve.mako')
+    def cve(self):
         schema = TicketForm().bind(request=self.request)
-        f = Form(schema, action=self.request.resource_url(self.context), buttons=('submit',))
-
-        try:
-            appstruct = f.validate(controls)
-
-            if len(appstruct['ticket']) == 0:
-                return HTTPSeeOther(location = self.request.resource_url(self.context))
-
-            ticket = m.Ticket(ticket=appstruct['ticket'], user=self.request.user.user)
-            contest.tickets.append(ticket)
-
-            #self.request.registry.notify(ContestContestTicketUpdated(ticket, self.request, self.context, contest))
-            self.request.session.flash('The information has been added to the contest', queue='event')
-            return HTTPSeeOther(location = self.request.resource_url(self.context))
-
-        except ValidationFailure, failed:
-            e = contest.to_appstruct()
-            e['logo'] = self.request.registry.settings['defcne.upload_path'] + contest.logo if contest.logo else ''
-            e['status'] = status_types[contest.status]
-            e['owner'] = contest.owner.disp_uname
-            e['ticket_count'] = len(m.Ticket.find_tickets(contest.id))
-            e['tickets'] = m.Ticket.find_tickets(contest.id)
-
-            e['edit_url'] = self.request.resource_url(self.context, contest.id, 'edit')
-            e['manage_url'] = self.request.resource_url(self.context, contest.id, 'manage')
-            e['magic_url'] = self.request.resource_url(self.context, contest.id)
+        f = Form(schema, action=self.request.resource_url(self.context, 'extrainfo'), buttons=('submit',))
 
-            return {
-                    'page_title': '{}'.format(contest.disp_name),
-                    'contest': e,
-                    'form': failed.render()
-                    }
+        return self._cve(f.render())
 
-    @view_config(context='..acl.Village', name='extrainfo', request_method='POST')
-    def village_extrainfo(self):
-        village = self.context.village
+    @view_config(context='..acl.CVE', name='extrainfo', renderer='magic/cve.mako', request_method='POST')
+    def cve_extrainfo(self):
+        cve = self.context.cve
 
         controls = self.request.POST.items()
         schema = TicketForm().bind(request=self.request)
-        f = Form(schema, action=self.request.resource_url(self.context), buttons=('submit',))
+        f = Form(schema, action=self.request.resource_url(self.context, 'extrainfo'), buttons=('submit',))
 
         try:
             appstruct = f.validate(controls)
@@ -456,231 +394,90 @@ class Magic(object):
                 return HTTPSeeOther(location = self.request.resource_url(self.context))
 
             ticket = m.Ticket(ticket=appstruct['ticket'], user=self.request.user.user)
-            village.tickets.append(ticket)
+            cve.tickets.append(ticket)
 
-            #self.request.registry.notify(VillageVillageTicketUpdated(ticket, self.request, self.context, village))
-            self.request.session.flash('The information has been added to the village', queue='event')
+            self.request.session.flash('The information has been added to the {}'.format(self.context.type.name), queue='cve')
             return HTTPSeeOther(location = self.request.resource_url(self.context))
 
         except ValidationFailure, failed:
-            e = village.to_appstruct()
-            e['logo'] = self.request.registry.settings['defcne.upload_path'] + village.logo if village.logo else ''
-            e['status'] = status_types[village.status]
-            e['owner'] = village.owner.disp_uname
-            e['ticket_count'] = len(m.Ticket.find_tickets(village.id))
-            e['tickets'] = m.Ticket.find_tickets(village.id)
-
-            e['edit_url'] = self.request.resource_url(self.context, village.id, 'edit')
-            e['manage_url'] = self.request.resource_url(self.context, village.id, 'manage')
-            e['magic_url'] = self.request.resource_url(self.context, village.id)
+            return self._cve(failed.render())
 
-            return {
-                    'page_title': '{}'.format(village.disp_name),
-                    'village': e,
-                    'form': failed.render()
-                    }
-
-
-    @view_config(context='..acl.Event', name='manage', renderer='magic/edit.mako')
-    def event_manage(self):
-        event = self.context.event
+    @view_config(context='..acl.CVE', name='manage', renderer='magic/edit.mako')
+    def cve_manage(self):
+        cve = self.context.cve
 
         astruct = {}
-        astruct['status'] = event.status
-
-        # Get badges
-        badges = m.DBSession.query(m.Badges).filter(m.Badges.cve_id == event.id).all()
-
-        astruct['badges'] = [{'id': x.id, 'typeof': x.type, 'amount': x.amount, 'why': x.reason} for x in badges]
-
-        schema = EventManagement().bind(request=self.request)
-        f = Form(schema, action=self.request.current_route_url(), buttons=('submit',))
-
-        return {
-                'form': f.render(astruct),
-                'page_title': 'Manage Event: {}'.format(event.disp_name),
-                }
-
-
-    @view_config(context='..acl.Event', name='manage', renderer='magic/edit.mako', request_method='POST')
-    def event_manage_submit(self):
-        event = self.context.event
-
-        controls = self.request.POST.items()
-        schema = EventManagement().bind(request=self.request)
-        f = Form(schema, action=self.request.current_route_url(), buttons=('submit',))
-
-        try:
-            appstruct = f.validate(controls)
-
-            event.status = appstruct['status']
-
-            badges = m.DBSession.query(m.Badges).filter(m.Badges.cve_id == event.id).all()
-
-            new_badge_ids = set([p['id'] for p in appstruct['badges'] if p['id'] != -1])
-            cur_badge_ids = set([p.id for p in badges])
-            del_badge_ids = cur_badge_ids - new_badge_ids
+        astruct['status'] = cve.status
 
-            if len(del_badge_ids):
-                for badge in badges:
-                    if badge.id in del_badge_ids:
-                        m.DBSession.delete(badge)
-
-            for badge in appstruct['badges']:
-                if badge['id'] in cur_badge_ids:
-                    cur_badge = [p for p in badges if p.id == badge['id']][0]
-                    cur_badge.type = badge['typeof']
-                    cur_badge.amount = badge['amount']
-                    cur_badge.reason = badge['why']
-                else:
-                    nbadge = m.Badges(cve_id=event.id, type=badge['typeof'], amount=badge['amount'], reason=badge['why'])
-                    m.DBSession.add(nbadge)
-                    m.DBSession.flush()
-
-            self.request.session.flash('Event {} has been updated.'.format(event.disp_name), queue='event')
-            return HTTPSeeOther(location = self.request.resource_url(self.context))
-        except ValidationFailure, e:
-            return {
-                    'form': e.render(),
-                    'page_title': 'Manage Event: {}'.format(event.disp_name),
-                    }
-
-
-    @view_config(context='..acl.Contest', name='manage', renderer='magic/edit.mako')
-    def contest_manage(self):
-        contest = self.context.contest
-
-        astruct = {}
-        astruct['status'] = contest.status
-        astruct['blackbadge'] = contest.blackbadge
+        if hasattr(cve, 'blackbadge'):
+            astruct['blackbadge'] = cve.blackbadge
 
         # Get badges
-        badges = m.DBSession.query(m.Badges).filter(m.Badges.cve_id == contest.id).all()
+        badges = m.DBSession.query(m.Badges).filter(m.Badges.cve_id == cve.id).all()
 
         astruct['badges'] = [{'id': x.id, 'typeof': x.type, 'amount': x.amount, 'why': x.reason} for x in badges]
 
-        schema = ContestManagement().bind(request=self.request)
+        schema = self.context.type.management().bind(request=self.request)
         f = Form(schema, action=self.request.current_route_url(), buttons=('submit',))
 
         return {
                 'form': f.render(astruct),
-                'page_title': 'Manage Contest: {}'.format(contest.disp_name),
+                'page_title': 'Manage {}: {}'.format(self.context.type.title, cve.disp_name),
                 }
 
-
-    @view_config(context='..acl.Contest', name='manage', renderer='magic/edit.mako', request_method='POST')
-    def contest_manage_submit(self):
-        contest = self.context.contest
+    @view_config(context='..acl.CVE', name='manage', renderer='magic/edit.mako', request_method='POST')
+    def cve_manage_submit(self):
+        cve = self.context.cve
 
         controls = self.request.POST.items()
-        schema = ContestManagement().bind(request=self.request)
+        schema = self.context.type.management().bind(request=self.request)
         f = Form(schema, action=self.request.current_route_url(), buttons=('submit',))
 
         try:
             appstruct = f.validate(controls)
 
-            contest.status = appstruct['status']
-            contest.blackbadge = appstruct['blackbadge']
+            changes = {}
+            set_changed(cve, changes, 'status', appstruct['status'])
+
+            if 'blackbadge' in appstruct:
+                set_changed(cve, changes, 'blackbadge', appstruct['blackbadge'])
 
-            badges = m.DBSession.query(m.Badges).filter(m.Badges.cve_id == contest.id).all()
+            badges = m.DBSession.query(m.Badges).filter(m.Badges.cve_id == cve.id).all()
 
-            new_badge_ids = set([p['id'] for p in appstruct['badges'] if p['id'] != -1])
-            cur_badge_ids = set([p.id for p in badges])
-            del_badge_ids = cur_badge_ids - new_badge_ids
+            badges = m.sync_collection(m.Badges, cve.id, badges,
+                    [{'id': b['id'], 'type': b['typeof'], 'amount': b['amount'], 'reason': b['why']} for b in appstruct['badges']])
 
-            if len(del_badge_ids):
-                for badge in badges:
-                    if badge.id in del_badge_ids:
-                        m.DBSession.delete(badge)
+            if badges:
+                changes['badges'] = badges
 
-            for badge in appstruct['badges']:
-                if badge['id'] in cur_badge_ids:
-                    cur_badge = [p for p in badges if p.id == badge['id']][0]
-                    cur_badge.type = badge['typeof']
-                    cur_badge.amount = badge['amount']
-                    cur_badge.reason = badge['why']
-                else:
-                    nbadge = m.Badges(cve_id=contest.id, type=badge['typeof'], amount=badge['amount'], reason=badge['why'])
-                    m.DBSession.add(nbadge)
-                    m.DBSession.flush()
+            if changes:
+                self.request.registry.notify(CVEUpdated(self.request, self.context, cve, changes=changes))
+                self.request.session.flash('{} {} has been updated.'.format(self.context.type.title, cve.disp_name), queue='cve')
+            else:
+                self.request.session.flash('Nothing was changed.', queue='cve')
 
-            self.request.session.flash('Contest {} has been updated.'.format(contest.disp_name), queue='event')
             return HTTPSeeOther(location = self.request.resource_url(self.context))
         except ValidationFailure, e:
             return {
                     'form': e.render(),
-                    'page_title': 'Manage Contest: {}'.format(contest.disp_name),
+                    'page_title': 'Manage {}: {}'.format(self.context.type.title, cve.disp_name),
                     }
 
+    @view_config(context='..acl.Usernames', renderer='magic/users.mako')
+    def users(self):
+        params = self.request.GET
 
-    @view_config(context='..acl.Village', name='manage', renderer='magic/edit.mako')
-    def village_manage(self):
-        village = self.context.village
-
-        astruct = {}
-        astruct['status'] = village.status
-
-        # Get badges
-        badges = m.DBSession.query(m.Badges).filter(m.Badges.cve_id == village.id).all()
-
-        astruct['badges'] = [{'id': x.id, 'typeof': x.type, 'amount': x.amount, 'why': x.reason} for x in badges]
-
-        schema = VillageManagement().bind(request=self.request)
-        f = Form(schema, action=self.request.current_route_url(), buttons=('submit',))
+        validated = None
+        if params.get('validated') in ('0', '1'):
+            validated = params['validated'] == '1'
 
-        return {
-                'form': f.render(astruct),
-                'page_title': 'Manage Village: {}'.format(village.disp_name),
+        filters = {
+                'group': params.get('group') or None,
+                'validated': validated,
+                'search': params.get('q') or None,
                 }
 
-
-    @view_config(context='..acl.Village', name='manage', renderer='magic/edit.mako', request_method='POST')
-    def village_manage_submit(self):
-        village = self.context.village
-
-        controls = self.request.POST.items()
-        schema = VillageManagement().bind(request=self.request)
-        f = Form(schema, action=self.request.current_route_url(), buttons=('submit',))
-
-        try:
-            appstruct = f.validate(controls)
-
-            village.status = appstruct['status']
-
-            badges = m.DBSession.query(m.Badges).filter(m.Badges.cve_id == village.id).all()
-
-            new_badge_ids = set([p['id'] for p in appstruct['badges'] if p['id'] != -1])
-            cur_badge_ids = set([p.id for p in badges])
-            del_badge_ids = cur_badge_ids - new_badge_ids
-
-            if len(del_badge_ids):
-                for badge in badges:
-                    if badge.id in del_badge_ids:
-                        m.DBSession.delete(badge)
-
-            for badge in appstruct['badges']:
-                if badge['id'] in cur_badge_ids:
-                    cur_badge = [p for p in badges if p.id == badge['id']][0]
-                    cur_badge.type = badge['typeof']
-                    cur_badge.amount = badge['amount']
-                    cur_badge.reason = badge['why']
-                else:
-                    nbadge = m.Badges(cve_id=village.id, type=badge['typeof'], amount=badge['amount'], reason=badge['why'])
-                    m.DBSession.add(nbadge)
-                    m.DBSession.flush()
-
-            self.request.session.flash('Village {} has been updated.'.format(village.disp_name), queue='event')
-            return HTTPSeeOther(location = self.request.resource_url(self.context))
-        except ValidationFailure, e:
-            return {
-                    'form': e.render(),
-                    'page_title': 'Manage Village: {}'.format(village.disp_name),
-                    }
-
-
-    @view_config(context='..acl.Usernames', renderer='magic/users.mako')
-    def users(self):
-        all_users = m.DBSession.query(m.User).order_by(m.User.username.asc()).all()
+        (all_users, next_after) = m.User.find_users(after=params.get('after') or None, **filters)
 
         users = []
 
@@ -695,10 +492,19 @@ class Magic(object):
             u['edit_url'] = self.request.resource_url(self.context, user.username, 'edit')
             users.append(u)
 
+        query = [(k, v) for (k, v) in params.items() if k in ('group', 'validated', 'q') and v]
+
+        next_url = None
+        if next_after is not None:
+            next_url = self.request.resource_url(self.context, query=query + [('after', next_after)])
 
         return {
                 'page_title': 'All Registered Users',
                 'users': users,
+                'groups': [name for (name,) in m.DBSession.query(m.Group.name).order_by(m.Group.name.asc())],
+                'filters': dict(query),
+                'first_url': self.request.resource_url(self.context, query=query),
+                'next_url': next_url,
                 }
 
     @view_config(context='..acl.Username', renderer='magic/user.mako')
@@ -747,6 +553,11 @@ class Magic(object):
                     if g.id in rem_groups:
                         user.groups.remove(g)
 
+            # Make sure that new and revoked groups take effect immediately
+            if len(new_groups) or len(rem_groups):
+                invalidate_user(self.request, user)
+                m.Group.invalidate_emails()
+
             user.validated = appstruct['validated']
 
             self.request.session.flash('User {} has been modified.'.format(user.disp_uname), queue='magic')
@@ -756,40 +567,39 @@ class Magic(object):
                     'form': e.render(),
                     'page_title': 'Editing user: {}'.format(user.disp_uname),
                     }
-    @view_config(context='..acl.Badges', renderer='magic/badges.mako')
-    def badges(self):
-        all_events = m.DBSession.query(m.Event).filter(m.Event.dc == 22).order_by(m.Event.name.asc()).all()
+    @view_config(context='..acl.Badges')
+    def badges_dcyears(self):
+        return HTTPSeeOther(location=self.request.route_url('defcne.magic', traverse=('badges', '22')))
 
-        badgecnt = {}
+    @view_config(context='..acl.DefconBadges', renderer='magic/badges.mako')
+    def badges(self):
+        types = None
 
-        for btype in badge_types.keys():
-            badgecnt[btype] = 0
+        if self.request.GET.get('type') in cve_types:
+            types = (self.request.GET['type'],)
 
-        events = []
-        for event in all_events:
-            if event.status not in [4, 5]:
-                continue
+        (all_cves, totals) = m.Badges.totals(self.context.dc, types=types)
 
+        cves = []
+        for cve in all_cves:
             e = {}
-            e['name'] = event.disp_name
-            e['status'] = status_types[event.status]
-            e['blackbadge'] = event.blackbadge
-            e['edit_url'] = self.request.route_url('defcne.magic', traverse=('e', event.dc, event.shortname, 'edit'))
-            e['manage_url'] = self.request.route_url('defcne.magic', traverse=('e', event.dc, event.shortname, 'manage'))
-            e['magic_url'] = self.request.route_url('defcne.magic', traverse=('e', event.dc, event.shortname))
-
-            # Get badges
-            badges = m.DBSession.query(m.Badges).filter(m.Badges.cve_id == event.id).all()
-            e['badges'] = [{'id': x.id, 'typeof': badge_types[x.type], 'amount': x.amount} for x in badges]
+            e['name'] = cve['disp_name']
+            e['type'] = cve['type'].capitalize()
+            e['status'] = status_types[cve['status']]
+            e['blackbadge'] = cve['blackbadge']
 
-            for badge in badges:
-                badgecnt[badge.type] = badgecnt[badge.type] + 1
+            traverse = (cve_types[cve['type']].path, cve['dc'], cve['id'])
+            e['edit_url'] = self.request.route_url('defcne.magic', traverse=traverse + ('edit',))
+            e['manage_url'] = self.request.route_url('defcne.magic', traverse=traverse + ('manage',))
+            e['magic_url'] = self.request.route_url('defcne.magic', traverse=traverse)
 
-            events.append(e)
+            e['badges'] = [{'typeof': badge_types[btype], 'amount': amount} for (btype, amount) in sorted(cve['badges'].items())]
+            cves.append(e)
 
-        badgecnts = [{'name': badge_types[key], 'amount': value} for (key, value) in badgecnt.items()]
+        badgecnts = [{'name': badge_types[key], 'amount': value} for (key, value) in sorted(totals.items())]
 
         return {
-                'events': events,
+                'page_title': 'Badges for DEF CON {}'.format(self.context.dc),
+                'cves': cves,
                 'count': badgecnts,
                 }
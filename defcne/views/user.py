@@ -38,10 +38,12 @@ from ..forms.User import (
 
 from .. import models as m
 from ..models.cvebase import status_types as event_status_types
+from ..cvetypes import cve_types
 
 from ..auth import (
         remember,
         forget,
+        invalidate_user,
         )
 
 from ..events import (
@@ -215,6 +217,17 @@ class User(object):
         schema = LoginForm(validator=login_username_password_matches).bind(request=self.request)
         af = Form(schema, action=self.request.current_route_url(), buttons=('submit',))
 
+        # Refuse the attempt before the password is checked if there have been
+        # too many attempts for this username or from this address
+        if not self.request.registry.login_throttle.allow(self.request.POST.get('username'), self.request.remote_addr):
+            self.request.response.status_int = 429
+            self.request.session.flash('Too many login attempts, please wait a minute and try again.', queue='user')
+            return {
+                    'form': af.render(),
+                    'page_title': 'Authenticate',
+                    'explanation': _auth_explain.format(create_url=self.request.route_url('defcne.user', traverse='create'), forgot_url=self.request.route_url('defcne.user', traverse='forgot')),
+                    }
+
         try:
             appstruct = af.validate(controls)
             user = appstruct['_internal']['user']
@@ -271,12 +284,7 @@ class User(object):
             event_info = event.to_appstruct()
             event_info['status'] = event_status_types[event.status]
 
-            if event.type == 'contest':
-                event_info['url'] = self.request.route_url('defcne.c', traverse=(event.dc, event.id, 'manage'))
-            if event.type == 'event':
-                event_info['url'] = self.request.route_url('defcne.e', traverse=(event.dc, event.id, 'manage'))
-            if event.type == 'village':
-                event_info['url'] = self.request.route_url('defcne.v', traverse=(event.dc, event.id, 'manage'))
+            event_info['url'] = self.request.route_url(cve_types[event.type].route, traverse=(event.dc, event.id, 'manage'))
 
             eventlist.append(event_info)
 
@@ -343,6 +351,8 @@ class User(object):
             user.credentials = appstruct['new_password']
 
             m.DBSession.query(m.UserForgot).filter(m.UserForgot.user_id == user.id).delete()
+
+            invalidate_user(self.request, user)
             m.DBSession.query(m.UserTickets).filter(m.UserTickets.user_id == user.id).delete()
 
             self.request.session.flash('Password has been updated!', queue='user')
@@ -418,6 +428,8 @@ class User(object):
             appstruct = rf.validate(controls)
             user = appstruct['_internal']['user']
             m.DBSession.query(m.UserForgot).filter(m.UserForgot.user_id == user.id).delete()
+
+            invalidate_user(self.request, user)
             m.DBSession.query(m.UserTickets).filter(m.UserTickets.user_id == user.id).delete()
 
             user.credreset = True
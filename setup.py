@@ -7,7 +7,7 @@ README = open(os.path.join(here, 'README.txt')).read()
 CHANGES = open(os.path.join(here, 'CHANGES.txt')).read()
 
 requires = [
-    'pyramid>=1.5b1',
+    'pyramid>=1.6',
     'SQLAlchemy',
     'psycopg2',
     'transaction',
@@ -47,7 +47,9 @@ setup(name='defcne',
       test_suite='defcne',
       install_requires=requires,
       extras_require = {
-          'develop': development
+          'develop': development,
+          'memcached': ['python-memcached'],
+          'images': ['Pillow'],
           },
       entry_points="""\
       [paste.app_factory]
@@ -55,5 +57,9 @@ setup(name='defcne',
       [console_scripts]
       defcne_create_db = defcne.scripts.initializedb:main
       defcne_destroy_db = defcne.scripts.destroydb:main
+      defcne_mail_queue = defcne.scripts.mailqueue:main
+      defcne_purge_tickets = defcne.scripts.purgetickets:main
+      defcne_purge_logos = defcne.scripts.purgelogos:main
+      defcne_compress_static = defcne.scripts.compressstatic:main
       """,
       )